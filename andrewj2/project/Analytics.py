@@ -0,0 +1,165 @@
+import os
+import math
+import random
+import tempfile
+from array import array
+from statistics import NormalDist
+from multiprocessing import Pool
+from Snapshot import load_snapshot
+from GraphStats import LevelBFS, connected_components
+
+# Shortest-path-length histogram and closeness centrality, which need a BFS from
+# every user. The sources are split into chunks across a process pool; workers
+# memory-map one temporary snapshot of the graph (read-only, shared), and their
+# partial results are merged here. Everything is in CSR positions until the end.
+#
+# Sampled mode runs the BFS from k random users only:
+#   - pairs at distance d: each source s sees x_s(d) of them, so n/2 * mean(x_s(d)) is
+#     an unbiased estimate, bounded with a normal confidence interval (with a finite
+#     population correction, the sources are drawn without replacement)
+#   - closeness: a user's average distance is estimated from the sampled sources
+#     that reach it (Eppstein-Wang); distances lie in [1, D], where D <= 2 * the
+#     smallest eccentricity seen in its island, so Hoeffding bounds the error by
+#     (D - 1) * sqrt(ln(2 / (1 - confidence)) / (2 * sources reaching it))
+
+CHUNK_SIZE = 64 # sources per task in exact mode
+
+_worker_bfs = None
+
+def _init_worker(snapshot_path):
+    global _worker_bfs
+    _worker_bfs = LevelBFS(load_snapshot(snapshot_path)[0])
+
+def _bfs_chunk(args):
+    # ([(source, eccentricity, total distance, [users at distance d, ...])],
+    #  per-user distance sums and source counts, only when asked for)
+    sources, per_user = args
+    n = _worker_bfs.csr.n
+    sums = array("i", [0]) * n if per_user else None
+    counts = array("i", [0]) * n if per_user else None
+    rows = []
+    for s in sources:
+        levels = _worker_bfs.levels(s)
+        hist = list(map(len, levels))
+        hist[0] = 0
+        rows.append((s, len(levels) - 1, sum(d * c for d, c in enumerate(hist)), hist))
+        if per_user:
+            for d in range(1, len(levels)):
+                for v in levels[d]:
+                    sums[v] += d
+                    counts[v] += 1
+    return (rows, sums, counts)
+
+def _run_pool(network, tasks, processes):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_path = os.path.join(tmp_dir, "network.snap")
+        saved, msg = network.save_network_to_snapshot(snapshot_path)
+        if not saved: raise RuntimeError(msg)
+        with Pool(processes, initializer=_init_worker, initargs=(snapshot_path,)) as pool:
+            yield from pool.imap_unordered(_bfs_chunk, tasks)
+
+def path_length_stats(network, samples=None, seed=None, processes=None, confidence=0.95):
+    csr = network.get_csr()
+    n = csr.n
+    reach = array("i", [0]) * n # users reachable from each user (island size - 1)
+    island = array("i", [0]) * n
+    connected_pairs = 0
+    for root, members in connected_components(csr).items():
+        connected_pairs += len(members) * (len(members) - 1) // 2
+        for i in members:
+            reach[i] = len(members) - 1
+            island[i] = root
+
+    stats = {
+        "users": n,
+        "uids": csr.uids,
+        "unreachable_pairs": n * (n - 1) // 2 - connected_pairs,
+    }
+    if samples and samples < n:
+        stats.update(_sampled(network, n, reach, island, connected_pairs, samples, seed, processes, confidence))
+    else:
+        stats.update(_exact(network, n, reach, connected_pairs, processes))
+    return stats
+
+def _exact(network, n, reach, connected_pairs, processes):
+    tasks = [(range(i, min(i + CHUNK_SIZE, n)), False) for i in range(0, n, CHUNK_SIZE)]
+    hist = [0]
+    closeness = array("d", [0.0]) * n
+    total_distance = 0
+    for rows, _, _ in _run_pool(network, tasks, processes):
+        for s, ecc, total, s_hist in rows:
+            hist.extend([0] * (len(s_hist) - len(hist)))
+            for d, c in enumerate(s_hist): hist[d] += c
+            total_distance += total
+            # Wasserman-Faust closeness, which stays comparable across islands:
+            # (reachable / (n-1)) * (reachable / total distance to them)
+            if total > 0: closeness[s] = reach[s] * reach[s] / ((n - 1) * total)
+
+    return {
+        "sources": n,
+        "histogram": {d: hist[d] // 2 for d in range(1, len(hist))}, # each pair was seen from both ends
+        "mean_distance": total_distance / (2 * connected_pairs) if connected_pairs else 0.0,
+        "closeness": closeness,
+    }
+
+def _sampled(network, n, reach, island, connected_pairs, samples, seed, processes, confidence):
+    sources = sorted(random.Random(seed).sample(range(n), samples))
+    k = len(sources)
+    n_tasks = min(k, processes or os.cpu_count() or 1)
+    tasks = [(sources[i::n_tasks], True) for i in range(n_tasks)]
+
+    rows = []
+    sums = array("i", [0]) * n
+    counts = array("i", [0]) * n
+    for chunk_rows, chunk_sums, chunk_counts in _run_pool(network, tasks, processes):
+        rows.extend(chunk_rows)
+        for v in range(n):
+            sums[v] += chunk_sums[v]
+            counts[v] += chunk_counts[v]
+
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    fpc = math.sqrt((n - k) / (n - 1))
+
+    def estimate(values, scale):
+        # (estimate, lower, upper) of scale * mean(values)
+        mean = sum(values) / k
+        sd = math.sqrt(sum((x - mean) ** 2 for x in values) / (k - 1)) if k > 1 else math.inf
+        err = z * scale * sd / math.sqrt(k) * fpc
+        return (scale * mean, max(0.0, scale * mean - err), scale * mean + err)
+
+    max_d = max(len(hist) for _, _, _, hist in rows) - 1
+    histogram = {}
+    for d in range(1, max_d + 1):
+        histogram[d] = estimate([hist[d] if d < len(hist) else 0 for _, _, _, hist in rows], n / 2)
+    # the pair count is known exactly from the islands, only the distance total is sampled
+    mean_distance = estimate([total for _, _, total, _ in rows], n / (2 * connected_pairs)) if connected_pairs else (0.0, 0.0, 0.0)
+
+    # island diameter upper bounds, from the sources that landed in each island
+    upper = {}
+    for s, ecc, _, _ in rows:
+        upper[island[s]] = min(upper.get(island[s], reach[s]), 2 * ecc)
+
+    log_term = math.log(2 / (1 - confidence))
+    est, lo, hi = (array("d", [0.0]) * n for _ in range(3))
+    for v in range(n):
+        r = reach[v]
+        if r == 0: continue
+        D = max(1, upper.get(island[v], r))
+        if counts[v] > 0:
+            avg = sums[v] / counts[v]
+            err = (D - 1) * math.sqrt(log_term / (2 * counts[v]))
+            est[v] = r / ((n - 1) * avg)
+            avg_lo, avg_hi = max(1, avg - err), min(D, avg + err)
+        else:
+            est[v] = math.nan # no sampled source reached this user
+            avg_lo, avg_hi = 1, D
+        lo[v] = r / ((n - 1) * avg_hi)
+        hi[v] = r / ((n - 1) * avg_lo)
+
+    return {
+        "sources": k,
+        "confidence": confidence,
+        "histogram_bounds": histogram,
+        "mean_distance_bounds": mean_distance,
+        "closeness_bounds": (est, lo, hi),
+    }
@@ -0,0 +1,87 @@
+import sys
+import json
+from time import perf_counter
+from GraphStats import graph_stats
+
+# Non-interactive mode: runs a script of queries, one per line, against a loaded
+# network and writes one JSON object per query. Blank lines and #comments are skipped.
+#   path <UID1> <UID2> [bfs|dijkstra|fw]
+#   ndeg <UID> <N>
+#   mutual <UID1> <UID2>
+#   suggest <UID> [K]
+#   stats [SAMPLES]
+# Latency percentiles (per query type) and throughput are returned as a summary.
+
+def query_path(network, uid1, uid2, alg="bfs"):
+    if alg == "fw": return network.get_path_fw(int(uid1), int(uid2))
+    if alg == "dijkstra": return network.get_path_dijkstra(int(uid1), int(uid2), lambda a, b: 1)
+    if alg == "bfs": return network.get_path_bfs(int(uid1), int(uid2))
+    raise ValueError(f"unknown path algorithm '{alg}'")
+
+def query_ndeg(network, uid, n):
+    return network.get_n_degree_rings(int(uid), int(n))
+
+def query_mutual(network, uid1, uid2):
+    uid1, uid2 = int(uid1), int(uid2)
+    if not network.has_user(uid1) or not network.has_user(uid2): return None
+    return sorted(network.get_mutual_connections(uid1, uid2))
+
+def query_suggest(network, uid, k=10):
+    return network.get_friend_suggestions(int(uid), int(k))
+
+def query_stats(network, samples=None):
+    stats = graph_stats(network.get_csr(), int(samples) if samples else None)
+    stats["component_sizes"] = list(stats["component_sizes"].items()) # [[size, islands], ...]
+    return stats
+
+QUERIES = {
+    "path": query_path,
+    "ndeg": query_ndeg,
+    "mutual": query_mutual,
+    "suggest": query_suggest,
+    "stats": query_stats,
+}
+
+def percentile(sorted_values, p):
+    # nearest-rank percentile of an already sorted list
+    if len(sorted_values) == 0: return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+def run_batch(network, lines, out=sys.stdout):
+    latencies = {} # query name: [seconds]
+    errors = 0
+    start = perf_counter()
+    for line_no, line in enumerate(lines, 1):
+        words = line.split("#", 1)[0].split()
+        if len(words) == 0: continue
+        name, args = words[0].lower(), words[1:]
+        record = {"line": line_no, "query": name, "args": args}
+
+        query_start = perf_counter()
+        try:
+            if name not in QUERIES: raise ValueError(f"unknown query '{name}'")
+            record["result"] = QUERIES[name](network, *args)
+        except Exception as e:
+            record["error"] = str(e) or type(e).__name__
+            errors += 1
+        elapsed = perf_counter() - query_start
+
+        record["ms"] = elapsed * 1000
+        latencies.setdefault(name, []).append(elapsed)
+        out.write(json.dumps(record) + "\n")
+    total_time = perf_counter() - start
+
+    summary = {"queries": 0, "errors": errors, "seconds": total_time, "per_query": {}}
+    for name, times in latencies.items():
+        times.sort()
+        summary["queries"] += len(times)
+        summary["per_query"][name] = {
+            "count": len(times),
+            "p50_ms": percentile(times, 50) * 1000,
+            "p90_ms": percentile(times, 90) * 1000,
+            "p99_ms": percentile(times, 99) * 1000,
+            "max_ms": times[-1] * 1000,
+        }
+    summary["queries_per_second"] = summary["queries"] / total_time if total_time > 0 else 0.0
+    return summary
@@ -0,0 +1,90 @@
+from array import array
+from bisect import bisect_left
+
+class CSRGraph:
+    # read-only compressed sparse row adjacency: vertex i (the i-th smallest uid) has
+    # neighbours targets[offsets[i]:offsets[i+1]], stored as sorted vertex positions
+    def __init__(self, uids, offsets, targets, name_offsets, name_blob):
+        self.uids = uids
+        self.offsets = offsets
+        self.targets = targets
+        self.name_offsets = name_offsets
+        self.name_blob = name_blob
+        self.n = len(uids)
+        # the CSVs number users 0..n-1, in which case positions and uids are the same
+        self.identity = self.n == 0 or (uids[0] == 0 and uids[-1] == self.n - 1)
+
+    def __str__(self):
+        return f"<CSRGraph n={self.n}, m={self.get_total_edges()}>"
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        return self.neighbors(i)
+
+    @classmethod
+    def from_users(cls, users):
+        users = sorted(users, key=lambda u: u.uid)
+        uids = array("q", map(lambda u: u.uid, users))
+        index = {uid: i for i, uid in enumerate(uids)}
+        offsets = array("q", [0])
+        targets = array("i")
+        name_offsets = array("q", [0])
+        names = []
+        for u in users:
+            targets.extend(sorted(index[fid] for fid in u.friends if fid in index))
+            offsets.append(len(targets))
+            names.append(u.name.encode())
+            name_offsets.append(name_offsets[-1] + len(names[-1]))
+        return cls(uids, offsets, targets, name_offsets, b"".join(names))
+
+    def index_of(self, uid):
+        if self.identity:
+            return uid if 0 <= uid < self.n else None
+        i = bisect_left(self.uids, uid)
+        return i if i < self.n and self.uids[i] == uid else None
+
+    def neighbors(self, i):
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def neighbor_uids(self, i):
+        nbrs = self.neighbors(i)
+        return nbrs if self.identity else list(map(self.uids.__getitem__, nbrs))
+
+    def degree(self, i):
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def has_edge(self, i, j):
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        k = bisect_left(self.targets, j, lo, hi)
+        return k < hi and self.targets[k] == j
+
+    def name(self, i):
+        return bytes(self.name_blob[self.name_offsets[i]:self.name_offsets[i + 1]]).decode()
+
+    def get_total_edges(self):
+        return len(self.targets) // 2
+
+    def common_neighbors(self, i, j):
+        # merge-intersection of the two sorted neighbour runs
+        a, a_end = self.offsets[i], self.offsets[i + 1]
+        b, b_end = self.offsets[j], self.offsets[j + 1]
+        targets = self.targets
+        common = []
+        while a < a_end and b < b_end:
+            x, y = targets[a], targets[b]
+            if x == y:
+                common.append(x)
+                a += 1
+                b += 1
+            elif x < y: a += 1
+            else: b += 1
+        return common
+
+    def get_size_bytes(self):
+        return sum(map(lambda arr: len(arr) * arr.itemsize,
+            (self.uids, self.offsets, self.targets, self.name_offsets))) + len(self.name_blob)
+
+    def get_adjacency_bytes(self):
+        return len(self.offsets) * self.offsets.itemsize + len(self.targets) * self.targets.itemsize
@@ -0,0 +1,146 @@
+import re
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from CSRGraph import CSRGraph
+
+# Varint (LEB128) helpers: 7 bits per byte, low bits first, high bit set on every
+# byte but the last. A run of varints splits into one token per value with a regex,
+# and tokens of 1-2 bytes (values below 16384, most friend ID gaps) are decoded
+# by one dict lookup, so decoding a friend list mostly runs in C
+
+_TOKEN = re.compile(rb"[\x80-\xff]*[\x00-\x7f]")
+_SHORT = {bytes([v]): v for v in range(0x80)}
+_SHORT.update({bytes([0x80 | lo, hi]): lo | hi << 7 for lo in range(0x80) for hi in range(0x80)})
+
+def encode_varint(v, out):
+    while v >= 0x80:
+        out.append(v & 0x7f | 0x80)
+        v >>= 7
+    out.append(v)
+
+def _decode_long(token):
+    v = 0
+    for k, b in enumerate(token):
+        v |= (b & 0x7f) << (7 * k)
+    return v
+
+def decode_varints(buf, start=0, end=None):
+    short = _SHORT
+    tokens = _TOKEN.findall(buf, start, len(buf) if end is None else end)
+    return [short[t] if len(t) <= 2 else _decode_long(t) for t in tokens]
+
+class CompressedGraph:
+    # read-only adjacency with the same interface as CSRGraph, but each user's sorted
+    # neighbour positions are stored as varint(degree), varint(zigzag(first - i)),
+    # varint(gap)... in one bytes buffer, with offsets[i] the start of user i's run;
+    # friends tend to have nearby IDs, so the first one is stored relative to the user
+    def __init__(self, uids, offsets, data, name_offsets, name_blob):
+        self.uids = uids
+        self.offsets = offsets
+        self.data = data
+        self.name_offsets = name_offsets
+        self.name_blob = name_blob
+        self.n = len(uids)
+        self.identity = self.n == 0 or (uids[0] == 0 and uids[-1] == self.n - 1)
+        self.n_edges = None
+
+    def __str__(self):
+        return f"<CompressedGraph n={self.n}, m={self.get_total_edges()}>"
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.n: raise IndexError(i)
+        return self.neighbors(i)
+
+    @classmethod
+    def from_csr(cls, csr):
+        offsets = array("q", [0])
+        data = bytearray()
+        for i in range(csr.n):
+            nbrs = csr.neighbors(i)
+            encode_varint(len(nbrs), data)
+            if len(nbrs) > 0:
+                first = nbrs[0] - i
+                encode_varint(2 * first if first >= 0 else -2 * first - 1, data)
+            for k in range(1, len(nbrs)):
+                encode_varint(nbrs[k] - nbrs[k - 1], data)
+            offsets.append(len(data))
+        if len(data) < 1 << 32: offsets = array("I", offsets) # 4-byte offsets when they fit
+        graph = cls(csr.uids, offsets, bytes(data), csr.name_offsets, csr.name_blob)
+        graph.n_edges = csr.get_total_edges()
+        return graph
+
+    @classmethod
+    def from_users(cls, users):
+        return cls.from_csr(CSRGraph.from_users(users))
+
+    def to_csr(self):
+        # plain CSR copy, for the whole-graph algorithms that work on the raw arrays
+        offsets = array("q", [0])
+        targets = array("i")
+        for i in range(self.n):
+            targets.extend(self.neighbors(i))
+            offsets.append(len(targets))
+        return CSRGraph(self.uids, offsets, targets, self.name_offsets, self.name_blob)
+
+    def index_of(self, uid):
+        if self.identity:
+            return uid if 0 <= uid < self.n else None
+        i = bisect_left(self.uids, uid)
+        return i if i < self.n and self.uids[i] == uid else None
+
+    def neighbors(self, i):
+        values = decode_varints(self.data, self.offsets[i], self.offsets[i + 1])
+        if len(values) < 2: return [] # values[0] is the degree
+        first = values[1]
+        values[1] = i + (first >> 1 if first & 1 == 0 else -((first + 1) >> 1))
+        return list(accumulate(values[1:]))
+
+    def neighbor_uids(self, i):
+        nbrs = self.neighbors(i)
+        return nbrs if self.identity else list(map(self.uids.__getitem__, nbrs))
+
+    def degree(self, i):
+        # the degree is the first varint of the run, so only its bytes are read
+        p = self.offsets[i]
+        token = _TOKEN.match(self.data, p, self.offsets[i + 1])
+        return 0 if token is None else decode_varints(token.group())[0]
+
+    def has_edge(self, i, j):
+        nbrs = self.neighbors(i)
+        k = bisect_left(nbrs, j)
+        return k < len(nbrs) and nbrs[k] == j
+
+    def name(self, i):
+        return bytes(self.name_blob[self.name_offsets[i]:self.name_offsets[i + 1]]).decode()
+
+    def get_total_edges(self):
+        if self.n_edges is None:
+            self.n_edges = sum(map(self.degree, range(self.n))) // 2
+        return self.n_edges
+
+    def common_neighbors(self, i, j):
+        # merge-intersection of the two decoded (sorted) neighbour lists
+        a_nbrs, b_nbrs = self.neighbors(i), self.neighbors(j)
+        a, b = 0, 0
+        common = []
+        while a < len(a_nbrs) and b < len(b_nbrs):
+            x, y = a_nbrs[a], b_nbrs[b]
+            if x == y:
+                common.append(x)
+                a += 1
+                b += 1
+            elif x < y: a += 1
+            else: b += 1
+        return common
+
+    def get_size_bytes(self):
+        return sum(map(lambda arr: len(arr) * arr.itemsize, (self.uids, self.offsets, self.name_offsets))) \
+            + len(self.data) + len(self.name_blob)
+
+    def get_adjacency_bytes(self):
+        # offsets + encoded friend lists, the part that replaces CSR's offsets + targets
+        return len(self.offsets) * self.offsets.itemsize + len(self.data)
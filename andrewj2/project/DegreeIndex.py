@@ -0,0 +1,80 @@
+class DegreeIndex:
+    # users bucketed by friend count; the non-empty buckets are chained in degree
+    # order, so a user moves to the next or previous bucket in O(1) when a friendship
+    # is added or removed, and the k most/least connected users are read off the ends
+    def __init__(self, degrees=()):
+        self.buckets = {} # degree: {uid: None}, ties in the order they reached the degree
+        self.degree = {} # uid: degree
+        self.higher = {} # degree: next non-empty degree above it
+        self.lower = {} # degree: next non-empty degree below it
+        self.max = None
+        self.min = None
+
+        # bulk build from (uid, degree) pairs: O(V + D log D) for D distinct degrees
+        for uid, d in degrees:
+            self.degree[uid] = d
+            self.buckets.setdefault(d, {})[uid] = None
+        chain = sorted(self.buckets)
+        for a, b in zip(chain, chain[1:]):
+            self.higher[a] = b
+            self.lower[b] = a
+        if len(chain) > 0:
+            self.min, self.max = chain[0], chain[-1]
+
+    def __len__(self):
+        return len(self.degree)
+
+    def __link(self, d, below, above):
+        # insert an empty bucket for degree d between two neighbouring degrees (either may be None)
+        self.buckets[d] = {}
+        if below is None: self.min = d
+        else:
+            self.higher[below] = d
+            self.lower[d] = below
+        if above is None: self.max = d
+        else:
+            self.lower[above] = d
+            self.higher[d] = above
+
+    def __unlink(self, d):
+        below, above = self.lower.pop(d, None), self.higher.pop(d, None)
+        del self.buckets[d]
+        if below is None: self.min = above
+        else:
+            if above is None: self.higher.pop(below)
+            else: self.higher[below] = above
+        if above is None: self.max = below
+        else:
+            if below is None: self.lower.pop(above)
+            else: self.lower[above] = below
+
+    def add(self, uid):
+        # new users have no friends yet, so they always belong in the lowest bucket
+        self.degree[uid] = 0
+        if 0 not in self.buckets: self.__link(0, None, self.min)
+        self.buckets[0][uid] = None
+
+    def move(self, uid, delta):
+        # delta is +1 (friend added) or -1 (friend removed)
+        d = self.degree[uid]
+        new_d = d + delta
+        if new_d not in self.buckets:
+            if delta > 0: self.__link(new_d, d, self.higher.get(d))
+            else: self.__link(new_d, self.lower.get(d), d)
+        del self.buckets[d][uid]
+        if len(self.buckets[d]) == 0: self.__unlink(d)
+        self.buckets[new_d][uid] = None
+        self.degree[uid] = new_d
+
+    def top(self, k, least=False):
+        # (uid, degree) for the k highest (or lowest) degrees; every bucket on the
+        # chain is non-empty, so this is O(k) however many users there are
+        result = []
+        d = self.min if least else self.max
+        step = self.higher if least else self.lower
+        while d is not None and len(result) < k:
+            for uid in self.buckets[d]:
+                result.append((uid, d))
+                if len(result) == k: break
+            d = step.get(d)
+        return result
@@ -0,0 +1,307 @@
+import os
+import math
+import mmap
+import struct
+from array import array
+from itertools import compress
+
+try: import numpy as np
+except ImportError: np = None
+
+class DistanceMatrix:
+    MAGIC = b"SNDM"
+    VERSION = 2
+    HEADER = struct.Struct("<4sHBBq") # magic, version, distance cell size, next-hop cell size, n
+    WIDTHS = ("B", "H") # try 8-bit cells first, fall back to 16-bit if a distance overflows
+    HOP_WIDTHS = ("H", "I") # next-hop cells hold a vertex position, so they only depend on n
+
+    def __init__(self, uids, buf, width):
+        self.__bind(uids, buf, width)
+
+    def __bind(self, uids, buf, width):
+        self.uids = uids
+        self.index = {uid: i for i, uid in enumerate(uids)}
+        self.n = len(uids)
+        self.width = width
+        self.inf = (1 << (8 * array(width).itemsize)) - 1 # unreachable marker
+        self.hop_width = self.get_hop_width(self.n)
+        self.__buf = buf # keeps the mmap/bytearray alive
+        offset = self.data_offset(self.n)
+        hop_offset = offset + self.n * self.n * array(width).itemsize
+        self.cells = memoryview(buf)[offset:hop_offset].cast(width)
+        # hops[i*n + j] is the position of the first vertex after uids[i] on a shortest path to uids[j]
+        self.hops = memoryview(buf)[hop_offset:hop_offset + self.n * self.n * array(self.hop_width).itemsize].cast(self.hop_width)
+
+    def __str__(self):
+        return f"<DistanceMatrix n={self.n}, width={self.width}>"
+
+    @staticmethod
+    def data_offset(n):
+        return DistanceMatrix.HEADER.size + 8 * n
+
+    @staticmethod
+    def get_hop_width(n):
+        return DistanceMatrix.HOP_WIDTHS[0] if n <= 0xFFFF else DistanceMatrix.HOP_WIDTHS[1]
+
+    @staticmethod
+    def get_size(n, width):
+        hop_size = array(DistanceMatrix.get_hop_width(n)).itemsize
+        return DistanceMatrix.data_offset(n) + n * n * (array(width).itemsize + hop_size)
+
+    def release(self):
+        self.cells.release()
+        self.hops.release()
+
+    def get_row(self, uid):
+        i = self.index[uid]
+        return self.cells[i * self.n:(i + 1) * self.n]
+
+    def get_distance(self, uid1, uid2):
+        i = self.index.get(uid1)
+        j = self.index.get(uid2)
+        if i is None or j is None: return math.inf
+        d = self.cells[i * self.n + j]
+        return math.inf if d == self.inf else d
+
+    def get_path(self, uid1, uid2, friends_fn):
+        # walk the next-hop matrix, O(path length); a hop is only trusted if it is still
+        # a friend one step closer to the target (removing a friendship can leave stale
+        # hops in rows whose distances didn't change), otherwise it is re-derived and fixed
+        i = self.index.get(uid1)
+        j = self.index.get(uid2)
+        if i is None or j is None: return None
+        n = self.n
+        if self.cells[i * n + j] == self.inf: return None
+
+        path = [uid1]
+        cur = i
+        while cur != j:
+            dist = self.cells[cur * n + j]
+            nxt = self.hops[cur * n + j]
+            friends = friends_fn(self.uids[cur])
+            if self.uids[nxt] not in friends or self.cells[nxt * n + j] != dist - 1:
+                nxt = next(map(self.index.__getitem__,
+                    filter(lambda fid: self.cells[self.index[fid] * n + j] == dist - 1, friends)))
+                self.hops[cur * n + j] = nxt
+            path.append(self.uids[nxt])
+            cur = nxt
+        return path
+
+    # === Building ===
+
+    @classmethod
+    def build(cls, uids, adj, cache_path=None):
+        for width in cls.WIDTHS:
+            buf = cls.__alloc(uids, width, cache_path)
+            matrix = cls(uids, buf, width)
+            if matrix.__fill(adj):
+                break
+            matrix.release()
+            if cache_path: buf.close()
+
+        if cache_path:
+            matrix.release()
+            buf.flush()
+            buf.close()
+            os.replace(cache_path + ".tmp", cache_path)
+            return cls.load(uids, cache_path)
+        return matrix
+
+    @classmethod
+    def __alloc(cls, uids, width, cache_path):
+        n = len(uids)
+        size = cls.get_size(n, width)
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path + ".tmp", mode="w+b") as file:
+                file.truncate(size)
+                buf = mmap.mmap(file.fileno(), size)
+        else:
+            buf = bytearray(size)
+
+        cls.HEADER.pack_into(buf, 0, cls.MAGIC, cls.VERSION, array(width).itemsize, array(cls.get_hop_width(n)).itemsize, n)
+        buf[cls.HEADER.size:cls.data_offset(n)] = array("q", uids).tobytes()
+        return buf
+
+    def __fill(self, adj):
+        if np is not None and self.n > 0:
+            return self.__fill_numpy(adj)
+
+        for src in range(self.n):
+            if not self.__fill_row(src, adj.__getitem__):
+                return False # overflow, retry with wider cells
+        return True
+
+    def __fill_row(self, src, neighbors):
+        n = self.n
+        row = array(self.width, [self.inf]) * n
+        hop = array(self.hop_width, [src]) * n
+        row[src] = 0
+        frontier = [src]
+        dist = 0
+        while len(frontier) > 0:
+            dist += 1
+            if dist >= self.inf: return False
+            next_frontier = []
+            for i in frontier:
+                for j in neighbors(i):
+                    if row[j] == self.inf:
+                        row[j] = dist
+                        hop[j] = j if i == src else hop[i]
+                        next_frontier.append(j)
+            frontier = next_frontier
+        self.cells[src * n:(src + 1) * n] = row
+        self.hops[src * n:(src + 1) * n] = hop
+        return True
+
+    def __fill_numpy(self, adj):
+        # same BFS from every source, but each level is expanded with array operations
+        n = self.n
+        degrees = np.fromiter(map(len, adj), dtype=np.int64, count=n)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(degrees, out=offsets[1:])
+        targets = np.fromiter((j for nbrs in adj for j in nbrs), dtype=np.int64, count=int(offsets[-1]))
+        mat = np.frombuffer(self.cells, dtype=np.dtype(self.width)).reshape(n, n)
+        hop_mat = np.frombuffer(self.hops, dtype=np.dtype(self.hop_width)).reshape(n, n)
+
+        for src in range(n):
+            row = mat[src]
+            hop = hop_mat[src]
+            row[:] = self.inf
+            hop[:] = src
+            row[src] = 0
+            frontier = np.array([src])
+            dist = 0
+            while frontier.size > 0:
+                dist += 1
+                if dist >= self.inf: return False
+                starts = offsets[frontier]
+                lens = offsets[frontier + 1] - starts
+                total = int(lens.sum())
+                if total == 0: break
+                idx = np.repeat(starts - np.cumsum(lens) + lens, lens) + np.arange(total)
+                nbrs = targets[idx]
+                parents = np.repeat(frontier, lens)
+                new = row[nbrs] == self.inf
+                nbrs, first = np.unique(nbrs[new], return_index=True)
+                row[nbrs] = dist
+                hop[nbrs] = nbrs if dist == 1 else hop[parents[new][first]]
+                frontier = nbrs
+        return True
+
+    # === Incremental Updates ===
+    # each method returns False if the matrix can't be patched (a distance no
+    # longer fits in the cell width), and the caller should rebuild it instead
+
+    def add_vertex(self, uid):
+        # new uids are always the largest, so the vertex goes at the end
+        n = self.n
+        old = (self.cells, self.hops)
+        self.__bind(self.uids + [uid], self.__alloc(self.uids + [uid], self.width, None), self.width)
+        if self.hop_width != self.get_hop_width(n):
+            return False
+
+        for new, old, blank in zip((self.cells, self.hops), old, (self.inf, n)):
+            for s in range(n):
+                new[s * (n + 1):s * (n + 1) + n] = old[s * n:(s + 1) * n]
+                new[s * (n + 1) + n] = blank
+            new[n * (n + 1):] = array(new.format, [blank]) * (n + 1)
+            old.release()
+        self.cells[n * (n + 1) + n] = 0
+        return True
+
+    def add_edge(self, uid1, uid2):
+        # a new edge (u,v) can only shorten d(s,t) to d(s,u)+1+d(v,t) or d(s,v)+1+d(u,t),
+        # and only rows where d(s,u) and d(s,v) differ by 2+ can use it at all
+        n, inf = self.n, self.inf
+        i, j = self.index[uid1], self.index[uid2]
+        row_i = array(self.width, self.cells[i * n:(i + 1) * n])
+        row_j = array(self.width, self.cells[j * n:(j + 1) * n])
+        reach_i = max((d for d in row_i if d != inf), default=0)
+        reach_j = max((d for d in row_j if d != inf), default=0)
+        if row_i[j] == inf and reach_i + reach_j + 1 >= inf:
+            return False # joining two components could create an overflowing distance
+
+        if np is not None:
+            return self.__add_edge_numpy(i, j, row_i, row_j)
+
+        candidates = {} # (base, near, far) -> base + d(far, *), shared by every row with that base
+        for s in range(n):
+            ds_i, ds_j = row_i[s], row_j[s] # == d(s,u), d(s,v) by symmetry
+            if ds_i + 1 < ds_j: key = (ds_i + 1, i, j)
+            elif ds_j + 1 < ds_i: key = (ds_j + 1, j, i)
+            else: continue
+
+            base, near, far = key
+            if key not in candidates:
+                candidates[key] = list(map(base.__add__, row_j if far == j else row_i))
+            cand = candidates[key]
+            row_s = self.cells[s * n:(s + 1) * n]
+            first_hop = far if s == near else self.hops[s * n + near]
+            for t in compress(range(n), map(int.__lt__, cand, row_s)):
+                row_s[t] = cand[t]
+                self.hops[s * n + t] = first_hop
+        return True
+
+    def __add_edge_numpy(self, i, j, row_i, row_j):
+        n = self.n
+        mat = np.frombuffer(self.cells, dtype=np.dtype(self.width)).reshape(n, n)
+        hop_mat = np.frombuffer(self.hops, dtype=np.dtype(self.hop_width)).reshape(n, n)
+        d_i = np.frombuffer(row_i, dtype=mat.dtype).astype(np.int64)
+        d_j = np.frombuffer(row_j, dtype=mat.dtype).astype(np.int64)
+        for near, far, d_near, d_far in ((i, j, d_i, d_j), (j, i, d_j, d_i)):
+            rows = np.flatnonzero(d_near + 1 < d_far)
+            if rows.size == 0: continue
+            cand = d_near[rows, None] + 1 + d_far[None, :]
+            sub = mat[rows]
+            better = cand < sub
+            sub[better] = cand[better]
+            mat[rows] = sub
+
+            first_hop = hop_mat[rows, near]
+            first_hop[rows == near] = far
+            hop_sub = hop_mat[rows]
+            hop_sub[better] = np.broadcast_to(first_hop[:, None], better.shape)[better]
+            hop_mat[rows] = hop_sub
+        return True
+
+    def remove_edge(self, uid1, uid2, friends_fn):
+        # only rows where the edge was tight (|d(s,u) - d(s,v)| == 1) can change, and
+        # even then only if the farther endpoint has no other neighbour as close as
+        # the nearer one; those rows are recomputed with a fresh BFS
+        n, inf = self.n, self.inf
+        i, j = self.index[uid1], self.index[uid2]
+        neighbors = lambda k: map(self.index.__getitem__, friends_fn(self.uids[k]))
+
+        for s in range(n):
+            ds_i, ds_j = self.cells[s * n + i], self.cells[s * n + j]
+            if ds_i == inf or ds_j == inf or abs(ds_i - ds_j) != 1: continue
+            near_d, far = (ds_i, j) if ds_i < ds_j else (ds_j, i)
+
+            if any(self.cells[s * n + w] == near_d for w in neighbors(far)):
+                continue
+            if not self.__fill_row(s, neighbors):
+                return False
+        return True
+
+    # === Cache ===
+
+    @classmethod
+    def load(cls, uids, cache_path):
+        try:
+            with open(cache_path, mode="rb") as file:
+                buf = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            return None
+        if len(buf) < cls.HEADER.size:
+            buf.close()
+            return None
+
+        magic, version, cell_size, hop_size, n = cls.HEADER.unpack_from(buf, 0)
+        width = next((w for w in cls.WIDTHS if array(w).itemsize == cell_size), None)
+        if magic != cls.MAGIC or version != cls.VERSION or not width or n != len(uids) \
+                or hop_size != array(cls.get_hop_width(n)).itemsize or len(buf) != cls.get_size(n, width) \
+                or array("q", buf[cls.HEADER.size:cls.data_offset(n)]).tolist() != uids:
+            buf.close()
+            return None
+        return cls(uids, buf, width)
@@ -0,0 +1,276 @@
+import random
+from array import array
+
+try: import numpy as np
+except ImportError: np = None
+
+# Whole-graph statistics, computed on a CSRGraph (vertex positions, not uids)
+
+class UnionFind:
+    def __init__(self, n):
+        self.parent = array("i", range(n))
+        self.size = array("i", [1]) * n
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]] # path halving
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b: return a
+        if self.size[a] < self.size[b]: a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return a
+
+def connected_components(csr):
+    # {root position: [member positions]}
+    uf = UnionFind(csr.n)
+    offsets, targets = csr.offsets, csr.targets
+    for i in range(csr.n):
+        for j in targets[offsets[i]:offsets[i + 1]]:
+            if j > i: uf.union(i, j)
+
+    components = {}
+    for i in range(csr.n):
+        components.setdefault(uf.find(i), []).append(i)
+    return components
+
+def component_size_histogram(components):
+    # {component size: number of components}, largest size first
+    hist = {}
+    for members in components.values():
+        hist[len(members)] = hist.get(len(members), 0) + 1
+    return dict(sorted(hist.items(), reverse=True))
+
+class LevelBFS:
+    # level-by-level BFS over the CSR arrays; `seen` is stamped with a new
+    # value per search so it never has to be cleared between searches
+    def __init__(self, csr):
+        self.csr = csr
+        self.seen = [0] * csr.n
+        self.dist = [0] * csr.n # valid where seen == stamp
+        self.stamp = 0
+        self.count = 0 # number of searches run, for reporting
+
+    def levels(self, src):
+        self.stamp += 1
+        self.count += 1
+        offsets, targets, seen, dist, stamp = self.csr.offsets, self.csr.targets, self.seen, self.dist, self.stamp
+        seen[src] = stamp
+        dist[src] = 0
+        levels = [[src]]
+        while True:
+            next_level = []
+            d = len(levels)
+            for i in levels[-1]:
+                for j in targets[offsets[i]:offsets[i + 1]]:
+                    if seen[j] != stamp:
+                        seen[j] = stamp
+                        dist[j] = d
+                        next_level.append(j)
+            if len(next_level) == 0: return levels
+            levels.append(next_level)
+
+    def walk_back(self, v, steps):
+        # from v, move `steps` levels towards the source of the last search
+        offsets, targets, seen, dist, stamp = self.csr.offsets, self.csr.targets, self.seen, self.dist, self.stamp
+        for _ in range(steps):
+            v = next(j for j in targets[offsets[v]:offsets[v + 1]] if seen[j] == stamp and dist[j] == dist[v] - 1)
+        return v
+
+    def eccentricity(self, src):
+        return len(self.levels(src)) - 1
+
+def four_sweep(bfs, r):
+    # two double sweeps, each restarted from the middle of the longest path found so
+    # far; gives a diameter lower bound and a central vertex to start iFUB from
+    lb = 0
+    for _ in range(2):
+        a = bfs.levels(r)[-1][0]
+        levels = bfs.levels(a)
+        lb = max(lb, len(levels) - 1)
+        r = bfs.walk_back(levels[-1][0], (len(levels) - 1) // 2)
+    return (r, lb)
+
+def component_diameter(bfs, members, lower=0):
+    # returns max(diameter, lower), which lets the search stop early on components
+    # that can't beat a diameter already found elsewhere
+    # iFUB: BFS from a high-degree vertex u gives its levels F_0..F_e; the diameter is
+    # in [lb, 2e], and any vertex at level i can only reach 2i away, so the levels
+    # are scanned from the outside in until the lower bound beats the upper bound
+    if len(members) - 1 <= lower: return lower
+    u, lb = four_sweep(bfs, max(members, key=bfs.csr.degree))
+    lb = max(lb, lower)
+
+    levels = bfs.levels(u)
+    ub = 2 * (len(levels) - 1)
+
+    i = len(levels) - 1
+    while ub > lb and i > 0:
+        # a longer path than 2(i-1) must end in level i or further out, so only
+        # once the whole level is scanned can lb be compared with what's left
+        for v in levels[i]:
+            lb = max(lb, bfs.eccentricity(v))
+            if lb >= ub: return lb
+        ub = 2 * (i - 1)
+        i -= 1
+    return lb
+
+def exact_diameter(csr, components):
+    bfs = LevelBFS(csr)
+    diameter = 0
+    # big components first, so smaller ones can be skipped once they can't beat the best
+    for members in sorted(components.values(), key=len, reverse=True):
+        diameter = max(diameter, component_diameter(bfs, members, diameter))
+    return (diameter, bfs.count)
+
+def sampled_diameter(csr, components, samples=16, seed=None):
+    # a double sweep gives a lower bound, and any vertex's eccentricity e bounds its
+    # component's diameter by 2e; one sweep per component (O(V+E) in total) plus
+    # sweeps from random vertices narrow that down to (lower, upper)
+    rng = random.Random(seed)
+    bfs = LevelBFS(csr)
+    lb = 0
+    ub_by_root = {}
+    root_of = {}
+
+    def sweep(src, root):
+        nonlocal lb
+        levels = bfs.levels(src)
+        bound = 2 * (len(levels) - 1)
+        ub_by_root[root] = min(ub_by_root.get(root, bound), bound)
+        lb = max(lb, len(levels) - 1, bfs.eccentricity(levels[-1][0]))
+
+    sized = []
+    for root, members in components.items():
+        if len(members) <= 2:
+            lb = max(lb, len(members) - 1)
+            continue
+        for i in members: root_of[i] = root
+        sized.append(members)
+        sweep(max(members, key=csr.degree), root)
+
+    weights = [len(members) for members in sized]
+    for _ in range(samples if len(sized) > 0 else 0):
+        src = rng.choice(rng.choices(sized, weights)[0])
+        sweep(src, root_of[src])
+
+    ub = max(ub_by_root.values(), default=0)
+    return (lb, max(lb, ub), bfs.count)
+
+def oriented_edges(csr):
+    # keeps each friendship once, pointing from the lower to the higher (degree,
+    # position) end; every user then has at most sqrt(2E) out-neighbours, still sorted
+    rank = array("i", [0]) * csr.n
+    for r, i in enumerate(sorted(range(csr.n), key=lambda i: (csr.degree(i), i))):
+        rank[i] = r
+    out_offsets = array("q", [0])
+    out_targets = array("i")
+    for i in range(csr.n):
+        r = rank[i]
+        out_targets.extend(j for j in csr.neighbors(i) if rank[j] > r)
+        out_offsets.append(len(out_targets))
+    return (out_offsets, out_targets)
+
+def triangle_counts(csr):
+    # triangles through each user: every triangle is found once, from its lowest
+    # ranked corner v, as a common out-neighbour x of v and its out-neighbour w
+    if np is not None and csr.n > 0:
+        return _triangle_counts_numpy(csr)
+
+    offsets, targets = oriented_edges(csr)
+    counts = array("q", [0]) * csr.n
+    for v in range(csr.n):
+        v_start, v_end = offsets[v], offsets[v + 1]
+        for p in range(v_start, v_end):
+            w = targets[p]
+            # merge-intersection of the two sorted out-neighbour runs
+            a, b, b_end = v_start, offsets[w], offsets[w + 1]
+            while a < v_end and b < b_end:
+                x, y = targets[a], targets[b]
+                if x == y:
+                    counts[v] += 1
+                    counts[w] += 1
+                    counts[x] += 1
+                    a += 1
+                    b += 1
+                elif x < y: a += 1
+                else: b += 1
+    return counts
+
+WEDGE_CHUNK = 1 << 22 # wedges checked per batch in the NumPy path
+
+def _triangle_counts_numpy(csr):
+    # same orientation; then every oriented edge v->w is paired with each out-neighbour
+    # x of v, and the wedge closes when w->x is an edge too (looked up as w*n+x keys)
+    n = csr.n
+    all_offsets = np.frombuffer(csr.offsets, dtype=np.int64)
+    all_targets = np.frombuffer(csr.targets, dtype=np.int32).astype(np.int64)
+    degrees = np.diff(all_offsets)
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.lexsort((np.arange(n), degrees))] = np.arange(n)
+    all_sources = np.repeat(np.arange(n, dtype=np.int64), degrees)
+    keep = rank[all_targets] > rank[all_sources]
+    sources, targets = all_sources[keep], all_targets[keep]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+    out_degrees = np.diff(offsets)
+    keys = sources * n + targets # already sorted: by source, then by target
+    counts = np.zeros(n, dtype=np.int64)
+
+    wedges = out_degrees[sources] # per edge
+    ends = np.cumsum(wedges)
+    e = 0
+    while e < len(targets):
+        # as many edges as fit in one chunk of wedges (at least one)
+        e_end = max(e + 1, int(np.searchsorted(ends, (ends[e - 1] if e > 0 else 0) + WEDGE_CHUNK, side="right")))
+        v, w, lens = sources[e:e_end], targets[e:e_end], wedges[e:e_end]
+        total = int(lens.sum())
+        if total > 0:
+            starts = offsets[v]
+            idx = np.repeat(starts - np.cumsum(lens) + lens, lens) + np.arange(total)
+            x = targets[idx]
+            v, w = np.repeat(v, lens), np.repeat(w, lens)
+            wedge_keys = w * n + x
+            pos = np.minimum(np.searchsorted(keys, wedge_keys), len(keys) - 1)
+            closed = keys[pos] == wedge_keys
+            for corner in (v[closed], w[closed], x[closed]):
+                counts += np.bincount(corner, minlength=n)
+        e = e_end
+    return array("q", counts.tobytes())
+
+def clustering_stats(csr):
+    counts = triangle_counts(csr)
+    clustering = array("d", [0.0]) * csr.n
+    wedges = 0 # paths of length 2, each triangle closes three of them
+    for i in range(csr.n):
+        d = csr.degree(i)
+        if d >= 2:
+            clustering[i] = 2 * counts[i] / (d * (d - 1))
+            wedges += d * (d - 1) // 2
+    triangles = sum(counts) // 3
+    return {
+        "triangles": triangles,
+        "transitivity": 3 * triangles / wedges if wedges else 0.0,
+        "average_clustering": sum(clustering) / csr.n if csr.n else 0.0,
+        "triangle_counts": counts,
+        "clustering": clustering,
+    }
+
+def graph_stats(csr, samples=None, seed=None):
+    components = connected_components(csr)
+    stats = {
+        "users": csr.n,
+        "connections": csr.get_total_edges(),
+        "components": len(components),
+        "component_sizes": component_size_histogram(components),
+    }
+    if samples:
+        stats["diameter_bounds"] = sampled_diameter(csr, components, samples, seed)[:2]
+    else:
+        stats["diameter"] = exact_diameter(csr, components)[0]
+    return stats
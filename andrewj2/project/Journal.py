@@ -0,0 +1,87 @@
+import io
+import os
+import csv
+
+# Write-ahead journal of network changes, kept next to the CSV/snapshot they apply to
+# ("<path>.journal") so a save only has to write what changed:
+#   base,<content hash of the CSV/snapshot>
+#   user,<uid>,<name>
+#   friend,<uid1>,<uid2>
+#   unfriend,<uid1>,<uid2>
+#   overwrite,<uid>,<name>,<friend uids>
+# A journal whose base hash doesn't match the file is left over from before a
+# compaction (its changes are already in the file) and is ignored. A torn last
+# record, from a crash mid-write, is dropped.
+
+class Journal:
+    def __init__(self, base_path, digest):
+        self.base_path = base_path
+        self.path = base_path + ".journal"
+        self.digest = digest
+        self.count = 0 # records written against the current base
+        self.pending = [] # records not yet written, until the next save
+        self.__valid_size = 0 # bytes of the existing journal that can be appended to
+        self.__file = None
+        self.__writer = None
+
+    def read(self):
+        # the records written against the current base, as lists of strings
+        try:
+            with open(self.path, mode="rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return []
+        # names may hold quoted newlines, so lines are handed to csv as they are, and
+        # each record's end is tracked to know where a torn one starts
+        rows, end, consumed = [], 0, 0
+        def lines():
+            nonlocal consumed
+            for line in io.BytesIO(data):
+                if not line.endswith(b"\n"): return # torn, never finished
+                consumed += len(line)
+                yield line.decode()
+        try:
+            for row in csv.reader(lines(), strict=True):
+                rows.append(row)
+                end = consumed
+        except csv.Error:
+            pass # torn inside a quoted field
+        if len(rows) == 0 or rows[0] != ["base", self.digest]: return []
+        self.__valid_size = end
+        self.count = len(rows) - 1
+        return rows[1:]
+
+    def __open(self):
+        if self.__valid_size > 0:
+            os.truncate(self.path, self.__valid_size)
+            self.__file = open(self.path, mode="a", newline="")
+            self.__writer = csv.writer(self.__file, lineterminator="\n")
+        else:
+            self.__file = open(self.path, mode="w", newline="")
+            self.__writer = csv.writer(self.__file, lineterminator="\n")
+            self.__writer.writerow(["base", self.digest])
+
+    def append(self, *record):
+        # changes are only written by flush(), so unsaved ones are dropped on exit
+        self.pending.append(record)
+        self.count += 1
+
+    def flush(self):
+        if len(self.pending) == 0: return
+        if not self.__file: self.__open()
+        self.__writer.writerows(self.pending)
+        self.pending = []
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+
+    def reset(self, digest):
+        # start over against a new base (after a compaction rewrote it)
+        if self.__file:
+            self.__file.close()
+            self.__file = None
+            self.__writer = None
+        self.digest = digest
+        self.count = 0
+        self.pending = []
+        self.__valid_size = 0
+        if os.path.exists(self.path): os.remove(self.path)
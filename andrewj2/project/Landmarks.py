@@ -0,0 +1,151 @@
+from array import array
+
+class LandmarkOracle:
+    # ALT distance oracle on a CSRGraph: BFS distances from L landmark users, stored
+    # user-major (the L distances of user v are cells[v*L:(v+1)*L]) so one slice per
+    # user gives everything a query needs. By the triangle inequality, for every
+    # landmark l: |d(l,s) - d(l,t)| <= d(s,t) <= d(l,s) + d(l,t)
+    DEFAULT_LANDMARKS = 128
+    WIDTHS = ("B", "H") # 8-bit cells unless some distance doesn't fit
+
+    def __init__(self, csr, landmarks, width, cells):
+        self.csr = csr
+        self.landmarks = landmarks # vertex positions
+        self.L = len(landmarks)
+        self.width = width
+        self.inf = (1 << (8 * array(width).itemsize)) - 1
+        self.cells = cells
+
+    @classmethod
+    def build(cls, csr, k=DEFAULT_LANDMARKS):
+        landmarks = cls.pick_landmarks(csr, k)
+        for width in cls.WIDTHS:
+            rows = []
+            for l in landmarks:
+                row = cls.__bfs_row(csr, l, width)
+                if row is None: break # too deep for this width, retry wider
+                rows.append(row)
+            else:
+                break
+        else:
+            raise ValueError("distances too long for the landmark cells")
+
+        L = len(landmarks)
+        cells = array(width, bytes(csr.n * L * array(width).itemsize))
+        for i, row in enumerate(rows):
+            cells[i::L] = row # strided copy, runs in C
+        return cls(csr, landmarks, width, cells)
+
+    @staticmethod
+    def pick_landmarks(csr, k):
+        # highest degree first, skipping friends of landmarks already picked so they
+        # don't all sit in the same neighbourhood; topped up with the skipped ones
+        by_degree = sorted(range(csr.n), key=csr.degree, reverse=True)
+        picked, near = [], set()
+        for i in by_degree:
+            if len(picked) == k: break
+            if i in near: continue
+            picked.append(i)
+            near.update(csr.neighbors(i))
+        if len(picked) < k:
+            chosen = set(picked)
+            picked.extend([i for i in by_degree if i not in chosen][:k - len(picked)])
+        return picked
+
+    @staticmethod
+    def __bfs_row(csr, src, width):
+        inf = (1 << (8 * array(width).itemsize)) - 1
+        offsets, targets = csr.offsets, csr.targets
+        row = array(width, [inf]) * csr.n
+        row[src] = 0
+        frontier = [src]
+        d = 0
+        while len(frontier) > 0:
+            d += 1
+            if d >= inf: return None
+            next_frontier = []
+            for i in frontier:
+                for j in targets[offsets[i]:offsets[i + 1]]:
+                    if row[j] == inf:
+                        row[j] = d
+                        next_frontier.append(j)
+            frontier = next_frontier
+        return row
+
+    def get_size_bytes(self):
+        return len(self.cells) * self.cells.itemsize
+
+    def row(self, i):
+        return self.cells[i * self.L:(i + 1) * self.L]
+
+    def bounds(self, i, j):
+        # (lower, upper) bounds on the distance between positions i and j, in O(L);
+        # (inf, inf) if some landmark reaches exactly one of them (different islands)
+        if i == j: return (0, 0)
+        inf = self.inf
+        lower, upper = 0, float("inf")
+        for a, b in zip(self.row(i), self.row(j)):
+            if a == inf or b == inf:
+                if a != b: return (float("inf"), float("inf"))
+                continue
+            lower = max(lower, abs(a - b))
+            upper = min(upper, a + b)
+        return (max(lower, 1), upper)
+
+    def landmark_path(self, i, j):
+        # a path of length bounds(i, j)[1], through the landmark that gives that bound:
+        # walk downhill in its distances from both ends until they meet at it
+        inf, L, cells = self.inf, self.L, self.cells
+        best, l = min(((a + b, l) for l, (a, b) in enumerate(zip(self.row(i), self.row(j))) if a != inf and b != inf), default=(None, None))
+        if best is None: return None
+
+        def walk(v):
+            steps = [v]
+            while cells[v * L + l] > 0:
+                down = cells[v * L + l] - 1
+                v = next(w for w in self.csr.neighbors(v) if cells[w * L + l] == down)
+                steps.append(v)
+            return steps
+
+        back = walk(j)
+        back.reverse()
+        return walk(i)[:-1] + back
+
+    def get_path(self, i, j):
+        # exact shortest path between positions i and j (or None). The landmark path is
+        # usually already shortest, so a bidirectional BFS only has to rule out anything
+        # shorter: it stops one level before the searches could meet at its length,
+        # which skips the biggest level of a plain search
+        if i == j: return [i]
+        lower, upper = self.bounds(i, j)
+        if lower == float("inf"): return None
+        best = self.landmark_path(i, j)
+        if lower == upper: return best
+
+        offsets, targets = self.csr.offsets, self.csr.targets
+        # (frontier, predecessors) of the searches from i and from j
+        a, b = ([i], {i: None}), ([j], {j: None})
+        depth = 0 # levels expanded so far, both searches together
+        while len(a[0]) > 0 and len(b[0]) > 0 and depth + 1 < upper:
+            grow, other = (a, b) if len(a[0]) <= len(b[0]) else (b, a)
+            frontier, pred = grow
+            next_level = []
+            for v in frontier:
+                for w in targets[offsets[v]:offsets[v + 1]]:
+                    if w in other[1]:
+                        path = self.__trace(v, pred)[::-1] + self.__trace(w, other[1])
+                        return path if grow is a else path[::-1]
+                    if w not in pred:
+                        pred[w] = v
+                        next_level.append(w)
+            grow[0][:] = next_level
+            depth += 1
+        return best
+
+    @staticmethod
+    def __trace(v, pred):
+        path = []
+        while v is not None:
+            path.append(v)
+            v = pred[v]
+        return path
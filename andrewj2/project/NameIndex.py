@@ -0,0 +1,41 @@
+class NameIndex:
+    # trigram inverted index for case-insensitive substring search over user names:
+    # any name containing the query also contains every trigram of the query, so the
+    # candidates are the intersection of those posting sets, which are then verified
+    def __init__(self):
+        self.postings = {} # trigram: set of uids
+        self.names = {} # uid: lowercased name
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def trigrams(s):
+        return {s[i:i+3] for i in range(len(s) - 2)}
+
+    def add(self, uid, name):
+        self.remove(uid)
+        name = name.lower()
+        self.names[uid] = name
+        for gram in self.trigrams(name):
+            self.postings.setdefault(gram, set()).add(uid)
+
+    def remove(self, uid):
+        name = self.names.pop(uid, None)
+        if name is None: return
+        for gram in self.trigrams(name):
+            posting = self.postings[gram]
+            posting.discard(uid)
+            if len(posting) == 0: del self.postings[gram]
+
+    def search(self, s):
+        s = s.lower()
+        if len(s) < 3:
+            candidates = self.names # too short to have a trigram, check every name
+        else:
+            postings = sorted(map(lambda gram: self.postings.get(gram, ()), self.trigrams(s)), key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                if len(candidates) == 0: break
+                candidates &= posting
+        return [uid for uid in candidates if s in self.names[uid]]
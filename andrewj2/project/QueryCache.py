@@ -0,0 +1,57 @@
+from collections import OrderedDict
+
+class QueryCache:
+    # LRU cache of query results, keyed by (query, args); every change to the
+    # network bumps its version, and a version change empties the cache on the next
+    # lookup. Cached results are shared between callers, so they must not be modified
+    DEFAULT_SIZE = 256
+
+    def __init__(self, network, size=DEFAULT_SIZE):
+        self.network = network
+        self.size = size
+        self.version = network.get_version()
+        self.entries = OrderedDict() # (query, args): result, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, query, *args):
+        # query(*args), or its cached result from an earlier call
+        if self.version != self.network.get_version():
+            if len(self.entries) > 0: self.invalidations += 1
+            self.clear()
+            self.version = self.network.get_version()
+
+        key = (query, args)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        self.misses += 1
+        result = query(*args)
+        if self.size > 0:
+            self.entries[key] = result
+            if len(self.entries) > self.size: self.entries.popitem(last=False)
+        return result
+
+    def resize(self, size):
+        self.size = size
+        while len(self.entries) > max(size, 0): self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "size": self.size,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,67 @@
+import os
+import csv
+import tempfile
+from sys import argv
+from multiprocessing import Pool
+from SocialNetwork import Network
+
+# Bulk friend suggestions: every user's top-k friends-of-friends, computed across a
+# process pool and written as CSV rows of "uid,fid:mutuals fid:mutuals ...".
+# Workers share the graph by memory-mapping one binary snapshot of it (read-only).
+
+CHUNK_SIZE = 256 # users per task
+
+_worker_network = None
+
+def _init_worker(snapshot_path):
+    global _worker_network
+    _worker_network = Network()
+    _worker_network.load_network_from_snapshot(snapshot_path)
+
+def _suggest_chunk(args):
+    uids, k = args
+    return [[uid, " ".join(f"{fid}:{m}" for fid, m in _worker_network.get_friend_suggestions(uid, k))] for uid in uids]
+
+def build_all_suggestions(network, out_path, k=10, processes=None):
+    try:
+        uids = network.get_all_uids()
+        tasks = [(uids[i:i + CHUNK_SIZE], k) for i in range(0, len(uids), CHUNK_SIZE)]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            snapshot_path = os.path.join(tmp_dir, "network.snap")
+            saved, msg = network.save_network_to_snapshot(snapshot_path)
+            if not saved: return (False, msg)
+
+            with Pool(processes, initializer=_init_worker, initargs=(snapshot_path,)) as pool, \
+                    open(out_path, mode='w') as file:
+                writer = csv.writer(file)
+                for rows in pool.imap(_suggest_chunk, tasks):
+                    writer.writerows(rows)
+    except Exception as e:
+        return (False, e)
+    return (True, "Success")
+
+def load_suggestions(csv_path):
+    suggestions = {}
+    with open(csv_path, mode='r') as file:
+        for row in csv.reader(file):
+            suggestions[int(row[0])] = [tuple(map(int, it.split(":"))) for it in row[1].split()]
+    return suggestions
+
+# python3 Recommender.py <NETWORK-PATH> <OUT-CSV-PATH> [K] [PROCESSES]
+
+if __name__ == "__main__":
+    if len(argv) < 3:
+        print("Precomputes friend suggestions for every user in a network")
+        print(f"Usage: python3 {argv[0]} <CSV-OR-SNAPSHOT-PATH> <OUT-CSV-PATH> [K] [PROCESSES]")
+        quit()
+
+    network = Network()
+    loaded, msg = network.load_network(argv[1])
+    if not loaded:
+        print(f"Network load error: {msg}")
+        quit(1)
+
+    k = int(argv[3]) if len(argv) > 3 else 10
+    processes = int(argv[4]) if len(argv) > 4 else None
+    built, msg = build_all_suggestions(network, argv[2], k, processes)
+    print(f"Friend suggestions: {msg}")
@@ -0,0 +1,179 @@
+import json
+import socket
+import asyncio
+import threading
+from sys import argv
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from SocialNetwork import Network
+from QueryCache import QueryCache
+from Batch import QUERIES
+
+# Local query server, so several analysts can share one loaded network.
+# Framing: every message is a 4-byte big-endian length followed by that many bytes
+# of UTF-8 JSON. Requests are {"query": name, "args": [...]} (any "id" is echoed
+# back), responses are {"result": ...} or {"error": message}.
+# Reads (the Batch.py queries) run side by side and writes (add_user, add_friend,
+# un_friend, save) wait for them through a readers-writer lock. Slow queries and
+# writes run in a thread pool so the event loop keeps answering the quick ones meanwhile.
+
+MAX_FRAME = 64 << 20
+HEAVY_QUERIES = {"stats"} # plus "path ... fw", which may have to build the matrix
+
+WRITES = {
+    "add_user": lambda network, name: network.add_new_user(name),
+    "add_friend": lambda network, uid1, uid2: network.add_friend(int(uid1), int(uid2)),
+    "un_friend": lambda network, uid1, uid2: network.un_friend(int(uid1), int(uid2)),
+    "save": lambda network: list(map(str, network.save_changes())),
+}
+
+class RWLock:
+    # asyncio readers-writer lock; waiting writers block new readers, so a steady
+    # stream of reads can't starve a write
+    def __init__(self):
+        self.__cond = asyncio.Condition()
+        self.__readers = 0
+        self.__writer = False
+        self.__waiting_writers = 0
+
+    @asynccontextmanager
+    async def reading(self):
+        async with self.__cond:
+            await self.__cond.wait_for(lambda: not self.__writer and self.__waiting_writers == 0)
+            self.__readers += 1
+        try:
+            yield
+        finally:
+            async with self.__cond:
+                self.__readers -= 1
+                if self.__readers == 0: self.__cond.notify_all()
+
+    @asynccontextmanager
+    async def writing(self):
+        async with self.__cond:
+            self.__waiting_writers += 1
+            await self.__cond.wait_for(lambda: not self.__writer and self.__readers == 0)
+            self.__waiting_writers -= 1
+            self.__writer = True
+        try:
+            yield
+        finally:
+            async with self.__cond:
+                self.__writer = False
+                self.__cond.notify_all()
+
+async def read_frame(reader):
+    # the decoded message, or None once the other side has closed the connection
+    try:
+        size = int.from_bytes(await reader.readexactly(4), "big")
+    except asyncio.IncompleteReadError:
+        return None
+    if size > MAX_FRAME: raise ValueError(f"frame of {size} bytes is too big")
+    return json.loads(await reader.readexactly(size))
+
+def encode_frame(msg):
+    body = json.dumps(msg).encode()
+    return len(body).to_bytes(4, "big") + body
+
+class NetworkServer:
+    def __init__(self, network, workers=2, cache_size=QueryCache.DEFAULT_SIZE):
+        self.network = network
+        self.lock = RWLock()
+        self.cache = QueryCache(network, cache_size) # only touched from the event loop
+        self.pool = ThreadPoolExecutor(workers)
+        self.fw_lock = threading.Lock() # the distance matrix is built and repaired in place
+
+    def is_heavy(self, name, args):
+        return name in HEAVY_QUERIES or (name == "path" and args[2:3] == ["fw"])
+
+    async def execute(self, name, args):
+        if name in WRITES:
+            async with self.lock.writing():
+                # "save" may compact the journal into a new CSV, so writes run off the loop too
+                return await asyncio.get_running_loop().run_in_executor(self.pool, WRITES[name], self.network, *args)
+        if name not in QUERIES:
+            raise ValueError(f"unknown query '{name}'")
+
+        async with self.lock.reading():
+            if self.is_heavy(name, args):
+                return await asyncio.get_running_loop().run_in_executor(self.pool, self.run_heavy, name, args)
+            return self.cache.get(QUERIES[name], self.network, *args)
+
+    def run_heavy(self, name, args):
+        if name == "path":
+            with self.fw_lock:
+                return QUERIES[name](self.network, *args)
+        return QUERIES[name](self.network, *args)
+
+    async def handle(self, reader, writer):
+        try:
+            while (request := await read_frame(reader)) is not None:
+                response = {"id": request.get("id")} if "id" in request else {}
+                try:
+                    response["result"] = await self.execute(request["query"], [str(arg) for arg in request.get("args", [])])
+                except Exception as e:
+                    response["error"] = str(e) or type(e).__name__
+                writer.write(encode_frame(response))
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass # dropped connection or bad frame, nothing to answer
+        finally:
+            writer.close()
+
+    async def serve(self, address):
+        # address is "HOST:PORT" for TCP or "unix:PATH" for a Unix socket
+        if address.startswith("unix:"):
+            server = await asyncio.start_unix_server(self.handle, address[len("unix:"):])
+        else:
+            host, port = address.rsplit(":", 1)
+            server = await asyncio.start_server(self.handle, host, int(port))
+        async with server:
+            await server.serve_forever()
+
+class NetworkClient:
+    # blocking client, one request at a time: NetworkClient("127.0.0.1:5050").query("path", 1, 5)
+    def __init__(self, address):
+        if address.startswith("unix:"):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(address[len("unix:"):])
+        else:
+            host, port = address.rsplit(":", 1)
+            self.sock = socket.create_connection((host, int(port)))
+        self.file = self.sock.makefile("rb")
+
+    def query(self, name, *args):
+        self.sock.sendall(encode_frame({"query": name, "args": list(args)}))
+        header = self.file.read(4)
+        if len(header) < 4: raise ConnectionError("server closed the connection")
+        response = json.loads(self.file.read(int.from_bytes(header, "big")))
+        if "error" in response: raise RuntimeError(response["error"])
+        return response["result"]
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# python3 Server.py <NETWORK-PATH> [HOST:PORT|unix:PATH]
+
+if __name__ == "__main__":
+    if len(argv) < 2:
+        print("Serves queries on one loaded network to local clients (see NetworkClient)")
+        print(f"Usage: python3 {argv[0]} <CSV-OR-SNAPSHOT-PATH> [HOST:PORT|unix:PATH]")
+        quit()
+
+    network = Network()
+    loaded, msg = network.load_network(argv[1])
+    if not loaded:
+        print(f"Network load error: {msg}")
+        quit(1)
+
+    address = argv[2] if len(argv) > 2 else "127.0.0.1:5050"
+    print(f"Serving {argv[1]} on {address}")
+    try: asyncio.run(NetworkServer(network).serve(address))
+    except KeyboardInterrupt: print()
@@ -0,0 +1,128 @@
+import os
+import mmap
+import struct
+import hashlib
+import tempfile
+from sys import argv
+from array import array
+from bisect import bisect_left
+from CSRGraph import CSRGraph
+
+# Binary network snapshot, laid out so a CSRGraph can be mapped straight out of the file:
+#   header | uids (q) | offsets (q) | name offsets (q) | neighbour positions (i) | names (utf-8)
+# every section starts on an 8-byte boundary, and the header records where
+
+MAGIC = b"SNBN"
+VERSION = 1
+HEADER = struct.Struct("<4sH2xqqq20s4x5q") # magic, version, n, targets, name bytes, sha1, section offsets
+CHUNK = 1 << 16 # items copied per step when assembling the file
+
+def is_snapshot(path):
+    try:
+        with open(path, mode="rb") as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def load_snapshot(path):
+    # O(1): only the header is read, the sections are paged in as they are touched
+    with open(path, mode="rb") as file:
+        buf = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(buf) < HEADER.size:
+        raise ValueError(f"'{path}' is not a network snapshot")
+    magic, version, n, n_targets, n_name_bytes, digest, *sections = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"'{path}' is not a version {VERSION} network snapshot")
+
+    mv = memoryview(buf)
+    sizes = (8 * n, 8 * (n + 1), 8 * (n + 1), 4 * n_targets, n_name_bytes)
+    uids, offsets, name_offsets, targets, names = (mv[o:o + size] for o, size in zip(sections, sizes))
+    graph = CSRGraph(uids.cast("q"), offsets.cast("q"), targets.cast("i"), name_offsets.cast("q"), names)
+    return (graph, digest.hex())
+
+class SnapshotWriter:
+    # streams users (in increasing uid order) into spool files, so a snapshot can be
+    # written without holding the whole network; only the uid list is kept in memory
+    def __init__(self, path):
+        self.path = path
+        self.uids = array("q")
+        self.__n_targets = 0
+        self.__n_name_bytes = 0
+        self.__offsets = tempfile.TemporaryFile()
+        self.__name_offsets = tempfile.TemporaryFile()
+        self.__targets = tempfile.TemporaryFile() # friend uids until every position is known
+        self.__names = tempfile.TemporaryFile()
+        self.__offsets.write(array("q", [0]).tobytes())
+        self.__name_offsets.write(array("q", [0]).tobytes())
+
+    def add_user(self, uid, name, friends):
+        if len(self.uids) > 0 and uid <= self.uids[-1]:
+            raise ValueError("users must be added in increasing uid order")
+        self.uids.append(uid)
+
+        friends = array("q", sorted(friends))
+        self.__targets.write(friends.tobytes())
+        self.__n_targets += len(friends)
+        self.__offsets.write(array("q", [self.__n_targets]).tobytes())
+
+        name = name.encode()
+        self.__names.write(name)
+        self.__n_name_bytes += len(name)
+        self.__name_offsets.write(array("q", [self.__n_name_bytes]).tobytes())
+
+    def close(self):
+        n = len(self.uids)
+        identity = n == 0 or (self.uids[0] == 0 and self.uids[-1] == n - 1)
+        digest = hashlib.sha1()
+        sections = []
+
+        with open(self.path + ".tmp", mode="wb") as out:
+            out.write(bytes(HEADER.size))
+
+            def section(chunks):
+                out.write(bytes(-out.tell() % 8))
+                sections.append(out.tell())
+                for chunk in chunks:
+                    digest.update(chunk)
+                    out.write(chunk)
+
+            def spooled(file, itemsize=1, convert=None):
+                file.seek(0)
+                while chunk := file.read(CHUNK * itemsize):
+                    yield convert(chunk) if convert else chunk
+                file.close()
+
+            def to_positions(chunk):
+                friends = array("q", chunk)
+                if not identity:
+                    friends = map(lambda uid: bisect_left(self.uids, uid), friends)
+                return array("i", friends).tobytes()
+
+            section([self.uids.tobytes()])
+            section(spooled(self.__offsets))
+            section(spooled(self.__name_offsets))
+            section(spooled(self.__targets, 8, to_positions))
+            section(spooled(self.__names))
+
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, VERSION, n, self.__n_targets, self.__n_name_bytes, digest.digest(), *sections))
+        os.replace(self.path + ".tmp", self.path)
+
+# === Converter ===
+# python3 Snapshot.py <CSV-PATH> <SNAPSHOT-PATH>
+
+if __name__ == "__main__":
+    from SocialNetwork import Network
+
+    if len(argv) < 3:
+        print("Converts a network CSV file into a binary snapshot")
+        print(f"Usage: python3 {argv[0]} <CSV-PATH> <SNAPSHOT-PATH>")
+        quit()
+
+    network = Network()
+    loaded, msg = network.load_network_from_csv(argv[1])
+    if not loaded:
+        print(f"Network load error: {msg}")
+        quit(1)
+    saved, msg = network.save_network_to_snapshot(argv[2])
+    print(f"Snapshot save: {msg}")
@@ -1,5 +1,19 @@
+import os
 import math
 import csv
+import heapq
+import hashlib
+from CSRGraph import CSRGraph
+from CompressedGraph import CompressedGraph
+from DistanceMatrix import DistanceMatrix
+from DegreeIndex import DegreeIndex
+from Landmarks import LandmarkOracle
+from NameIndex import NameIndex
+from Journal import Journal
+from Snapshot import SnapshotWriter, is_snapshot, load_snapshot
+
+COMPACT_MIN_RECORDS = 1000 # journals shorter than this are never compacted
+COMPACT_FRACTION = 0.25 # compact once the journal reaches this fraction of (users + friendships)
 
 class User:
     def __init__(self, uid, name, friends=None):
@@ -16,23 +30,109 @@ class User:
 class Network:
     def __init__(self):
         self.__u_dict = {}
+        self.__csr = None # compact read-only copy of the graph, replaces __u_dict while frozen
         self.__next_uid = 0
         self.__d_matrix = None
+        self.__landmarks = None # (oracle, network version it was built at)
+        self.__name_index = NameIndex() # None until needed after a snapshot load
+        self.__degree_index = None # built on the first most/least-connected query
+        self.__source = None # (path, content hash) of the file this network still matches
+        self.__journal = None # changes since the file the network was loaded from
+        self.__version = 0 # bumped by every change to the graph, for caches built on top of it
 
     def __str__(self):
-        return f"<Network len(__map)={len(self.__u_dict)}>"
+        return f"<Network len(__map)={self.get_total_users()}>"
+
+    # === Frozen Storage ===
+
+    def freeze(self, compressed=False):
+        # swap the User objects and friend sets for a CSR graph (a few bytes per friendship),
+        # or for varint-compressed friend lists (smaller still, but decoded on every read)
+        if self.__csr is None:
+            self.__csr = CSRGraph.from_users(self.__u_dict.values())
+            self.__u_dict = {}
+        if compressed and not isinstance(self.__csr, CompressedGraph):
+            self.__csr = CompressedGraph.from_csr(self.__csr)
+        elif not compressed and isinstance(self.__csr, CompressedGraph):
+            self.__csr = self.__csr.to_csr()
+        return self.__csr
+
+    def thaw(self):
+        if self.__csr is None: return
+        csr = self.__csr
+        self.__csr = None
+        for i in range(csr.n):
+            self.__u_dict[csr.uids[i]] = User(csr.uids[i], csr.name(i), set(csr.neighbor_uids(i)))
+
+    def is_frozen(self):
+        return self.__csr is not None
+
+    def get_storage(self):
+        if self.__csr is None: return "editable"
+        return "compressed" if isinstance(self.__csr, CompressedGraph) else "csr"
+
+    def get_csr(self):
+        # the frozen graph, or a CSR copy of the editable or compressed one for
+        # whole-graph algorithms
+        if isinstance(self.__csr, CompressedGraph): return self.__csr.to_csr()
+        if self.__csr is not None: return self.__csr
+        return CSRGraph.from_users(self.__u_dict.values())
+
+    def get_storage_bytes(self):
+        # (bytes, bytes per friendship) of the adjacency (friend lists and their index)
+        # in the current storage; the editable one is estimated from the CSR equivalent
+        graph = self.__csr if self.__csr is not None else CSRGraph.from_users(self.__u_dict.values())
+        size = graph.get_adjacency_bytes()
+        m = graph.get_total_edges()
+        return (size, size / m if m else 0.0)
+
+    # === Queries ===
+
+    def get_version(self):
+        return self.__version
+
+    def has_user(self, uid):
+        if self.__csr is not None: return self.__csr.index_of(uid) is not None
+        return uid in self.__u_dict
 
     def get_user_by_uid(self, uid):
+        if self.__csr is not None:
+            # frozen networks hand out detached copies
+            i = self.__csr.index_of(uid)
+            return None if i is None else User(uid, self.__csr.name(i), set(self.__csr.neighbor_uids(i)))
         return self.__u_dict.get(uid)
 
+    def get_name(self, uid):
+        if self.__csr is not None:
+            i = self.__csr.index_of(uid)
+            return None if i is None else self.__csr.name(i)
+        u = self.__u_dict.get(uid)
+        return u.name if u else None
+
+    def get_friends(self, uid):
+        if self.__csr is not None:
+            i = self.__csr.index_of(uid)
+            return () if i is None else self.__csr.neighbor_uids(i)
+        u = self.__u_dict.get(uid)
+        return u.friends if u else ()
+
+    def get_degree(self, uid):
+        if self.__csr is not None:
+            i = self.__csr.index_of(uid)
+            return 0 if i is None else self.__csr.degree(i)
+        u = self.__u_dict.get(uid)
+        return len(u.friends) if u else 0
+
     def get_users_by_uids(self, uid_list):
         return list(map(self.get_user_by_uid, uid_list))
 
     def get_all_users(self):
+        if self.__csr is not None: return self.get_users_by_uids(self.__csr.uids)
         return sorted(self.__u_dict.values(), key=lambda u: u.uid)
 
     def get_all_uids(self):
-        return list(map(lambda u: u.uid, self.get_all_users()))
+        if self.__csr is not None: return list(self.__csr.uids)
+        return sorted(self.__u_dict)
 
     def get_all_connections(self):
         connections = set()
@@ -43,184 +143,452 @@ class Network:
         return connections
 
     def get_mutual_connections(self, uid1, uid2):
+        if self.__csr is not None:
+            csr = self.__csr
+            common = csr.common_neighbors(csr.index_of(uid1), csr.index_of(uid2))
+            return common if csr.identity else list(map(csr.uids.__getitem__, common))
         u1 = self.get_user_by_uid(uid1)
         u2 = self.get_user_by_uid(uid2)
-        return list(set(u1.friends) & set(u2.friends))
+        return list(u1.friends & u2.friends)
+
+    def search_users_by_name(self, substr, k=None):
+        # case-insensitive substring search, most friends first (then lowest uid)
+        if self.__name_index is None:
+            self.__name_index = NameIndex()
+            for uid in self.get_all_uids():
+                self.__name_index.add(uid, self.get_name(uid))
+
+        uids = self.__name_index.search(substr)
+        key = lambda uid: (self.get_degree(uid), -uid)
+        top = heapq.nlargest(k, uids, key=key) if k else sorted(uids, key=key, reverse=True)
+        return self.get_users_by_uids(top)
+
+    def get_most_connected(self, k, least=False):
+        # the k users with the most (or fewest) friends
+        if self.__degree_index is None:
+            self.__degree_index = DegreeIndex((uid, self.get_degree(uid)) for uid in self.get_all_uids())
+        return self.get_users_by_uids(uid for uid, _ in self.__degree_index.top(k, least))
+
+    def get_friend_suggestions(self, uid, k=10):
+        # friends-of-friends: every 2-hop path uid -> friend -> candidate is one mutual
+        # friend for that candidate, so one walk over the 2-hop neighbourhood counts them all
+        friends = self.get_friends(uid)
+        mutuals = {}
+        for fid in friends:
+            for cid in self.get_friends(fid):
+                mutuals[cid] = mutuals.get(cid, 0) + 1
+
+        mutuals.pop(uid, None)
+        for fid in friends:
+            mutuals.pop(fid, None) # already connected
+
+        # (uid, n_mutual), most mutual friends first, then most friends, then lowest uid
+        return heapq.nlargest(k, mutuals.items(), key=lambda it: (it[1], self.get_degree(it[0]), -it[0]))
+
+    def get_adjacency_lists(self):
+        # dense view of the graph: position i holds the neighbour positions of uids[i]
+        if self.__csr is not None: return (self.get_all_uids(), self.__csr)
+        uids = self.get_all_uids()
+        index = {uid: i for i, uid in enumerate(uids)}
+        adj = [[index[fid] for fid in self.__u_dict[uid].friends if fid in index] for uid in uids]
+        return (uids, adj)
 
     def get_total_users(self):
+        if self.__csr is not None: return self.__csr.n
         return len(self.__u_dict)
     
     def get_total_connections(self):
+        if self.__csr is not None: return self.__csr.get_total_edges()
         return sum(map(lambda u: len(u.friends), self.__u_dict.values())) // 2
 
+    # === Mutations (a frozen network is thawed first) ===
+
     def add_new_user(self, name):
+        self.thaw()
         uid = self.__next_uid
         self.__next_uid += 1
         self.__u_dict[uid] = User(uid, name)
+        self.__source = None
+        self.__version += 1
+        if self.__d_matrix and not self.__d_matrix.add_vertex(uid):
+            self.__d_matrix = None
+        if self.__name_index is not None: self.__name_index.add(uid, name)
+        if self.__degree_index is not None: self.__degree_index.add(uid)
+        if self.__journal: self.__journal.append("user", uid, name)
         return uid
     
     def overwrite_user(self, user):
+        self.thaw()
         self.__u_dict[user.uid] = user
         if self.__next_uid <= user.uid:
             self.__next_uid = user.uid + 1
+        self.__source = None
+        self.__version += 1
+        self.__d_matrix = None # the whole friend set may have changed
+        if self.__name_index is not None: self.__name_index.add(user.uid, user.name)
+        self.__degree_index = None # degrees are only tracked one friendship at a time
+        if self.__journal: self.__journal.append("overwrite", user.uid, user.name, " ".join(map(str, user.friends)))
 
     def add_friend(self, uid1, uid2):
         if uid1 == uid2: return
+        self.thaw()
         u1 = self.get_user_by_uid(uid1)
         u2 = self.get_user_by_uid(uid2)
         if not u1 or not u2: return # error?
+        if uid2 in u1.friends: return
         u1.friends.add(uid2)
         u2.friends.add(uid1)
+        self.__source = None
+        self.__version += 1
+        if self.__degree_index is not None:
+            self.__degree_index.move(uid1, 1)
+            self.__degree_index.move(uid2, 1)
+        if self.__journal: self.__journal.append("friend", uid1, uid2)
+        if self.__d_matrix and not self.__d_matrix.add_edge(uid1, uid2):
+            self.__d_matrix = None
 
     def un_friend(self, uid1, uid2):
+        self.thaw()
         u1 = self.get_user_by_uid(uid1)
         u2 = self.get_user_by_uid(uid2)
-        if u1: u1.friends.discard(uid2)
-        if u2: u2.friends.discard(uid1)
+        if not u1 or not u2 or uid2 not in u1.friends: return
+        u1.friends.discard(uid2)
+        u2.friends.discard(uid1)
+        self.__source = None
+        self.__version += 1
+        if self.__degree_index is not None:
+            self.__degree_index.move(uid1, -1)
+            self.__degree_index.move(uid2, -1)
+        if self.__journal: self.__journal.append("unfriend", uid1, uid2)
+        if self.__d_matrix and not self.__d_matrix.remove_edge(uid1, uid2, self.get_friends):
+            self.__d_matrix = None
+
+    # === Persistence ===
+
+    def load_network(self, path):
+        # loads the CSV/snapshot, then replays its journal (the changes saved since)
+        if is_snapshot(path):
+            loaded, msg = self.load_network_from_snapshot(path)
+        else:
+            loaded, msg = self.load_network_from_csv(path)
+        if not loaded: return (loaded, msg)
+
+        journal = Journal(path, self.__source[1])
+        try:
+            for record in journal.read():
+                self.__replay(record)
+        except Exception as e:
+            return (False, e)
+        self.__journal = journal
+        return (True, "Success")
+
+    def __replay(self, record):
+        kind, *args = record
+        if kind == "user":
+            uid = self.add_new_user(args[1])
+            if uid != int(args[0]): raise ValueError(f"journal expected new user {args[0]}, got {uid}")
+        elif kind == "friend": self.add_friend(int(args[0]), int(args[1]))
+        elif kind == "unfriend": self.un_friend(int(args[0]), int(args[1]))
+        elif kind == "overwrite": self.overwrite_user(User(int(args[0]), args[1], set(map(int, args[2].split()))))
+        else: raise ValueError(f"unknown journal record '{kind}'")
+
+    def save_changes(self):
+        # O(changes): appends to the journal, and only rewrites the whole file (in its
+        # own format) once the journal grows past a fraction of the network
+        if not self.__journal: return (False, "Network wasn't loaded from a file")
+        try:
+            self.__journal.flush()
+        except Exception as e:
+            return (False, e)
+        limit = COMPACT_FRACTION * (self.get_total_users() + self.get_total_connections())
+        if self.__journal.count > max(COMPACT_MIN_RECORDS, limit):
+            return self.compact()
+        return (True, "Success")
+
+    def compact(self):
+        # rewrite the file with every change applied, then start an empty journal; the
+        # old journal names the old file's hash, so a crash in between loses nothing
+        if not self.__journal: return (False, "Network wasn't loaded from a file")
+        path = self.__journal.base_path
+        tmp_path = path + ".tmp"
+        if is_snapshot(path):
+            saved, msg = self.save_network_to_snapshot(path) # already written via a temp file
+        else:
+            saved, msg = self.save_network_to_csv(tmp_path)
+            if saved: os.replace(tmp_path, path)
+        if not saved: return (saved, msg)
+
+        try:
+            if is_snapshot(path):
+                digest = load_snapshot(path)[1]
+            else:
+                with open(path, mode='rb') as file:
+                    digest = hashlib.sha1(file.read()).hexdigest()
+            self.__journal.reset(digest)
+        except Exception as e:
+            return (False, e)
+        self.__source = (path, digest)
+        return (True, "Success (compacted)")
 
     def load_network_from_csv(self, csv_path):
+        self.__journal = None
         try:
+            with open(csv_path, mode='rb') as file:
+                digest = hashlib.sha1(file.read()).hexdigest()
             with open(csv_path, mode='r') as file:
                 rows = csv.reader(file)
                 for row in rows:
                     self.overwrite_user(User(int(row[0]), row[1], set(map(int, row[2].split()))))
         except Exception as e:
             return (False, e)
+        self.__source = (csv_path, digest)
         return (True, "Success")
 
     def save_network_to_csv(self, csv_path):
         try:
             with open(csv_path, mode='w') as file:
                 writer = csv.writer(file)
-                writer.writerows(map(lambda u: [u.uid, u.name, " ".join(map(str, u.friends))], self.__u_dict.values()))
+                writer.writerows(map(lambda u: [u.uid, u.name, " ".join(map(str, u.friends))], self.get_all_users()))
         except Exception as e:
             return (False, e)
         return (True, "Success")
 
-    def bfs_traverse(self, start_uid, visit_fn=None, end_uid=None, end_dist=math.inf):
-        frontier = []
-        next_frontier = [] # so that we can keep track of distance
-        discovered = set()
-        distances = {}
-
-        frontier.append(start_uid)
-        discovered.add(start_uid)
-        distances[start_uid] = 0
+    def load_network_from_snapshot(self, snapshot_path):
+        # the snapshot is memory-mapped and used as-is, so the network comes back frozen
+        self.__journal = None
+        try:
+            csr, digest = load_snapshot(snapshot_path)
+        except Exception as e:
+            return (False, e)
+        self.__u_dict = {}
+        self.__csr = csr
+        self.__version += 1
+        self.__next_uid = csr.uids[-1] + 1 if csr.n > 0 else 0
+        self.__d_matrix = None
+        self.__name_index = None # built on the first search, to keep the load O(1)
+        self.__degree_index = None
+        self.__source = (snapshot_path, digest)
+        return (True, "Success")
 
-        dist = 0
-        while len(frontier) > 0 and dist <= end_dist:
-            uid = frontier.pop()
-            user = self.get_user_by_uid(uid)
-            if not user: continue # error?
+    def save_network_to_snapshot(self, snapshot_path):
+        try:
+            writer = SnapshotWriter(snapshot_path)
+            for u in self.get_all_users():
+                writer.add_user(u.uid, u.name, u.friends)
+            writer.close()
+        except Exception as e:
+            return (False, e)
+        return (True, "Success")
 
-            if visit_fn: visit_fn(user.copy())
-            if uid == end_uid: break
+    # === Traversal & Paths ===
+
+    def bfs_levels(self, start_uids, max_depth=math.inf):
+        # level-synchronous BFS from any number of users at once, yielding (uid, depth)
+        # as each user is reached and stopping after max_depth levels; a frozen
+        # network is searched in CSR positions, an editable one directly by uid
+        csr = self.__csr
+        if csr is not None:
+            to_key, neighbors = csr.index_of, csr.neighbors
+            to_uid = int if csr.identity else csr.uids.__getitem__
+            visited = bytearray(csr.n)
+        else:
+            u_dict, n = self.__u_dict, self.__next_uid
+            # friend sets may name users that don't exist (overwrite_user takes them as given)
+            known = lambda uid: 0 <= uid < n and uid in u_dict
+            to_key = lambda uid: uid if known(uid) else None
+            neighbors = lambda uid: filter(known, u_dict[uid].friends)
+            to_uid = int
+            visited = bytearray(n)
 
-            for fid in user.friends:
-                if fid not in discovered:
-                    next_frontier.insert(0,fid)
-                    discovered.add(fid)
-                    distances[fid] = distances[uid]+1
-            
-            if len(frontier) == 0: # move to next distance frontier
-                frontier = next_frontier
-                next_frontier = []
-                dist += 1
-        
-        if end_dist:
-            return dict((k,v) for k,v in distances.items() if v <= end_dist)
+        frontier = []
+        for uid in start_uids:
+            key = to_key(uid)
+            if key is not None and not visited[key]:
+                visited[key] = 1
+                frontier.append(key)
+                yield (to_uid(key), 0)
+
+        depth = 0
+        while len(frontier) > 0 and depth < max_depth:
+            depth += 1
+            next_frontier = []
+            for key in frontier:
+                for n_key in neighbors(key):
+                    if not visited[n_key]:
+                        visited[n_key] = 1
+                        next_frontier.append(n_key)
+                        yield (to_uid(n_key), depth)
+            frontier = next_frontier
 
+    def bfs_traverse(self, start_uid, visit_fn=None, end_uid=None, end_dist=math.inf):
+        distances = {}
+        for uid, dist in self.bfs_levels([start_uid], end_dist):
+            distances[uid] = dist
+            if visit_fn: visit_fn(self.get_user_by_uid(uid))
+            if uid == end_uid: break
         return distances
 
+    def get_n_degree_rings(self, uid, n):
+        # [[uids 1 step away], [uids 2 steps away], ...] up to n steps, in BFS order
+        rings = []
+        for fid, deg in self.bfs_levels([uid], n):
+            if deg == 0: continue
+            if deg > len(rings): rings.append([])
+            rings[-1].append(fid)
+        return rings
+
     def dfs_traverse(self, start_uid, visit_fn=None, end_uid=None):
         v_stack = []
         visited = set()
 
         while len(v_stack) > 0:
             uid = v_stack.pop()
-            user = self.get_user_by_uid(uid)
-            if not user: continue # error?
+            if not self.has_user(uid): continue # error?
 
             if uid not in visited:
-                if visit_fn: visit_fn(user.copy())
+                if visit_fn: visit_fn(self.get_user_by_uid(uid).copy())
                 if uid == end_uid: break
                 visited.add(uid)
                 
-                for fid in user.friends:
+                for fid in self.get_friends(uid):
                     v_stack.append(fid)
 
-    def get_path_dijkstra(self, start_uid, end_uid):
-        unvisited = self.get_all_uids()
+    def get_path_bfs(self, start_uid, end_uid):
+        if not self.has_user(start_uid) or not self.has_user(end_uid):
+            return None
+        if start_uid == end_uid:
+            return [start_uid]
+
+        # bidirectional BFS: grow the smaller frontier one full level at a time,
+        # the first edge that joins the two searches lies on a shortest path
+        fwd_pred = {start_uid: None}
+        bwd_pred = {end_uid: None}
+        fwd_frontier = [start_uid]
+        bwd_frontier = [end_uid]
+
+        while len(fwd_frontier) > 0 and len(bwd_frontier) > 0:
+            if len(fwd_frontier) <= len(bwd_frontier):
+                fwd_frontier, meet = self.__expand_frontier(fwd_frontier, fwd_pred, bwd_pred)
+                if meet: return self.__join_paths(meet[0], meet[1], fwd_pred, bwd_pred)
+            else:
+                bwd_frontier, meet = self.__expand_frontier(bwd_frontier, bwd_pred, fwd_pred)
+                if meet: return self.__join_paths(meet[1], meet[0], fwd_pred, bwd_pred)
+
+        return None
+
+    def __expand_frontier(self, frontier, pred, other_pred):
+        next_frontier = []
+        for uid in frontier:
+            for fid in self.get_friends(uid):
+                if fid in other_pred:
+                    return (next_frontier, (uid, fid))
+                if fid not in pred:
+                    pred[fid] = uid
+                    next_frontier.append(fid)
+        return (next_frontier, None)
+
+    def __join_paths(self, fwd_uid, bwd_uid, fwd_pred, bwd_pred):
+        path = []
+        uid = fwd_uid
+        while uid is not None:
+            path.append(uid)
+            uid = fwd_pred[uid]
+        path.reverse()
+
+        uid = bwd_uid
+        while uid is not None:
+            path.append(uid)
+            uid = bwd_pred[uid]
+        return path
+
+    def get_path_dijkstra(self, start_uid, end_uid, weight_fn=None):
+        # every friendship has weight 1 today, so the unweighted engine is exact;
+        # passing weight_fn(uid1, uid2) selects the heap-based search instead
+        if not weight_fn:
+            return self.get_path_bfs(start_uid, end_uid)
+
+        if not self.has_user(start_uid) or not self.has_user(end_uid):
+            return None
+
         # uid: (dist, pred)
-        d_dict = {k:v for k,v in map(lambda uid: (uid, (math.inf, None)), unvisited)}
-        d_dict[start_uid] = (0, None)
-
-        while len(unvisited) > 0:
-            min_i = 0
-            for i in range(1, len(unvisited)):
-                if d_dict[unvisited[i]][0] < d_dict[min_i][0]: min_i = i
-            uid = unvisited.pop(min_i)
-
-            new_dist = d_dict[uid][0] + 1
-            for fid in self.get_user_by_uid(uid).friends:
-                if new_dist < d_dict[fid][0]: d_dict[fid] = (new_dist, uid)
-        
-        if d_dict[end_uid][0] == math.inf:
+        d_dict = {start_uid: (0, None)}
+        heap = [(0, start_uid)]
+        done = set()
+
+        while len(heap) > 0:
+            dist, uid = heapq.heappop(heap)
+            if uid in done: continue # stale heap entry
+            done.add(uid)
+            if uid == end_uid: break
+
+            for fid in self.get_friends(uid):
+                new_dist = dist + weight_fn(uid, fid)
+                if fid not in done and new_dist < d_dict.get(fid, (math.inf,))[0]:
+                    d_dict[fid] = (new_dist, uid)
+                    heapq.heappush(heap, (new_dist, fid))
+
+        if end_uid not in done:
             return None
 
         path = []
         uid = end_uid
-        while uid != start_uid:
-            path = [uid] + path
+        while uid is not None:
+            path.append(uid)
             uid = d_dict[uid][1]
-        return [start_uid] + path
+        path.reverse()
+        return path
+
+    # === All Pairs Distances ===
+
+    def get_d_matrix_cache_path(self):
+        # all-pairs matrices are cached next to the CSV/snapshot they were built from,
+        # keyed by its content hash, until the network is modified
+        if not self.__source: return None
+        csv_path, digest = self.__source
+        return os.path.join(os.path.dirname(os.path.abspath(csv_path)), ".cache", f"{digest}.dmx")
 
     def build_d_matrix_fw(self):
         if self.__d_matrix: return self.__d_matrix
 
-        v_list = self.get_all_uids()
-        n = len(v_list)
-        e_list = self.get_all_connections()
-        
-        d_matrix = []
-        for i in range(0, n):
-            d_matrix.append([math.inf] * n)
-            d_matrix[i][i] = 0
-        
-        for e in e_list:
-            d_matrix[v_list.index(e[0])][v_list.index(e[1])] = 1
-        
-        for i in range(0, n):
-            for to in range(0, n):
-                for fm in range(0, n):
-                    new_len = d_matrix[fm][i] + d_matrix[i][to]
-                    if new_len < d_matrix[fm][to]:
-                        d_matrix[fm][to] = new_len
+        uids, adj = self.get_adjacency_lists()
+        cache_path = self.get_d_matrix_cache_path()
+        d_matrix = DistanceMatrix.load(uids, cache_path) if cache_path else None
+        if not d_matrix:
+            d_matrix = DistanceMatrix.build(uids, adj, cache_path)
 
         self.__d_matrix = d_matrix
         return d_matrix
 
     def get_path_fw(self, start_uid, end_uid):
-        d_matrix = self.build_d_matrix_fw()
-
-        v_list = self.get_all_uids()
-        e_list = self.get_all_connections()
-        start = v_list.index(start_uid)
-        path = [end_uid]
-
-        cur = v_list.index(end_uid)
-        while cur != start:
-            cur_e_list = set(filter(lambda e: e[1] == v_list[cur], e_list))
-            found_next = False
-            for e in cur_e_list:
-                expect = d_matrix[start][cur] - 1
-                actual = d_matrix[start][v_list.index(e[0])]
-                if actual != math.inf and expect == actual:
-                    cur = v_list.index(e[0])
-                    path = [e[0]] + path
-                    found_next = True
-                    break
-            if not found_next:
-                return None
-        
-        return path
+        return self.build_d_matrix_fw().get_path(start_uid, end_uid, self.get_friends)
+
+    # === Landmark Distances ===
+
+    def build_landmarks(self, k=LandmarkOracle.DEFAULT_LANDMARKS):
+        # for networks too big for the all-pairs matrix; rebuilt after any change
+        oracle = LandmarkOracle.build(self.get_csr(), k)
+        self.__landmarks = (oracle, self.__version)
+        return oracle
+
+    def get_landmarks(self):
+        if self.__landmarks and self.__landmarks[1] == self.__version:
+            return self.__landmarks[0]
+        return self.build_landmarks(self.__landmarks[0].L if self.__landmarks else LandmarkOracle.DEFAULT_LANDMARKS)
+
+    def get_distance_bounds(self, uid1, uid2):
+        # (lower, upper) bounds on the number of steps between two users, in O(landmarks)
+        oracle = self.get_landmarks()
+        i, j = oracle.csr.index_of(uid1), oracle.csr.index_of(uid2)
+        if i is None or j is None: return None
+        return oracle.bounds(i, j)
+
+    def get_path_alt(self, start_uid, end_uid):
+        # exact shortest path: the landmark upper bound's path, checked by a bidirectional
+        # BFS that stops one level before it could meet at that length
+        oracle = self.get_landmarks()
+        csr = oracle.csr
+        i, j = csr.index_of(start_uid), csr.index_of(end_uid)
+        if i is None or j is None: return None
+        path = oracle.get_path(i, j)
+        if path is None or csr.identity: return path
+        return list(map(csr.uids.__getitem__, path))
@@ -0,0 +1,80 @@
+import json
+import random
+import platform
+from sys import argv
+from time import perf_counter
+from SocialNetwork import Network
+from GraphStats import graph_stats
+
+# Times the main network operations on one or more CSV/snapshot corpora (e.g. made
+# with gen_network.py) and writes the results as JSON. Query endpoints are drawn
+# with a fixed seed, so runs on the same corpus time the same queries.
+
+QUERIES = 100 # per query type
+BFS_QUERIES = 10 # full traversals are slower
+STATS_SAMPLES = 16 # sampled diameter, an exact one can take too long on big corpora
+
+def timed(fn, args_list):
+    # {count, total, mean, min, max} in seconds, over one call per args tuple
+    times = []
+    for args in args_list:
+        start = perf_counter()
+        fn(*args)
+        times.append(perf_counter() - start)
+    if len(times) == 0: return {"count": 0}
+    return {"count": len(times), "total": sum(times), "mean": sum(times) / len(times), "min": min(times), "max": max(times)}
+
+def bench_corpus(path, seed=0):
+    network = Network()
+    start = perf_counter()
+    loaded, msg = network.load_network(path)
+    load_time = perf_counter() - start
+    if not loaded: return {"path": path, "error": str(msg)}
+
+    uids = network.get_all_uids()
+    rng = random.Random(seed)
+    pairs = [(rng.choice(uids), rng.choice(uids)) for _ in range(QUERIES if uids else 0)]
+    sources = [(rng.choice(uids),) for _ in range(BFS_QUERIES if uids else 0)]
+
+    def bfs(uid):
+        for _ in network.bfs_levels([uid]): pass
+
+    return {
+        "path": path,
+        "storage": network.get_storage(),
+        "users": network.get_total_users(),
+        "connections": network.get_total_connections(),
+        "load": load_time,
+        "bfs": timed(bfs, sources),
+        "path_bfs": timed(network.get_path_bfs, pairs),
+        "mutual_friends": timed(network.get_mutual_connections, pairs),
+        "friend_suggestions": timed(network.get_friend_suggestions, [(uid,) for uid, _ in pairs[:QUERIES // 10]]),
+        "stats": timed(lambda: graph_stats(network.get_csr(), STATS_SAMPLES, seed), [()]),
+    }
+
+def run_benchmarks(paths, seed=0):
+    return {
+        "python": platform.python_version(),
+        "seed": seed,
+        "corpora": [bench_corpus(path, seed) for path in paths],
+    }
+
+# python3 benchmark.py <OUT-JSON-PATH> <NETWORK-PATH>...
+
+if __name__ == "__main__":
+    if len(argv) < 3:
+        print("Times loading, BFS, paths, mutual friends, suggestions and statistics on each network")
+        print(f"Usage: python3 {argv[0]} <OUT-JSON-PATH> <CSV-OR-SNAPSHOT-PATH>...")
+        quit()
+
+    results = run_benchmarks(argv[2:])
+    with open(argv[1], mode='w') as file:
+        json.dump(results, file, indent=2)
+    for corpus in results["corpora"]:
+        if "error" in corpus:
+            print(f"{corpus["path"]}: {corpus["error"]}")
+            continue
+        print(f"{corpus["path"]}: {corpus["users"]} users, {corpus["connections"]} connections, loaded in {corpus["load"]:.3f}s")
+        for name in ("bfs", "path_bfs", "mutual_friends", "friend_suggestions", "stats"):
+            if corpus[name]["count"] > 0:
+                print(f"\t{name}: {corpus[name]["mean"] * 1000:.3f}ms mean over {corpus[name]["count"]}")
@@ -1,89 +1,110 @@
-import random as r
+import csv
 import math
-from SocialNetwork import Network
+import random
+from sys import argv
 from names import names
+from Snapshot import SnapshotWriter
 
-def gen_network(lst):
-    net = Network()
-
-    for n in lst:
-        net.add_new_user(n)
-
-    def connect_range(a, b, n):
-        for _ in range(0, n):
-            id1 = r.randint(a, b)
-            id2 = r.randint(a, b)
-            net.add_friend(id1, id2)
-
-    def connect_user(id1, a, b, n):
-        for _ in range(0, n):
-            id2 = r.randint(a, b)
-            net.add_friend(id1, id2)
-
-    # create 7 islands
-    n = math.ceil(len(lst)/7)
-    for i in range(7):
-        a = i * n
-        b = min((i+1)*n-1, len(lst)-1)
-        connect_range(a, b, r.randint(n*6, n*7))
-
-        # with a few popular people each
-        for j in range(r.randint(n//200, n//100)):
-            uid = r.randint(a, b)
-            connect_user(uid, a, b, r.randint(n//20, n//5)) # popular in the island
-            connect_user(uid, 0, len(lst)-1, r.randint(2,5)) # and a couple connections outside
-
-    # add a few connections across the whole network
-    for i in range(len(lst)//100):
-        uid = r.randint(0, len(lst)-1)
-        connect_user(uid, 0, len(lst)-1, 1)
-    
-    return net
-
-r.shuffle(names)
-N = 100
-names = names[:N]
-network = Network()
-for n in names:
-    network.add_new_user(n)
-for _ in range(0, 3*N):
-    id1 = r.randint(0, N)
-    id2 = r.randint(0, N)
-    network.add_friend(id1, id2)
-
-# diameter = 0
-# while(diameter < 10):
-#     network = gen_network(names)
-
-#     total = network.get_total_users()
-#     visited = set()
-#     islands = 0
-#     while len(visited) < network.get_total_users():
-#         i = 0
-#         while i in visited or not network.get_user_by_id(i):
-#             i += 1
-#             continue
-
-#         distances = network.bfs_traverse(i, visit_fn=lambda u: visited.add(u.uid))
-#         islands += 1
-
-#         d = sorted(distances.values(), reverse=True)[0]
-#         if diameter < d: diameter = d
-#     n_users = network.get_total_users()
-#     n_conns = network.get_total_connections()
-#     print(f"Total Users: {n_users}")
-#     print(f"Total Connections: {n_conns}")
-#     print(f"Average Connections Per User: {n_conns / n_users}")
-
-#     for user in network.get_top_n_users(5):
-#         print(user)
-#     print()
-#     for user in network.get_top_n_users(5, bottom=True):
-#         print(user)
-#     print()
-
-#     print(f"Graph diameter: {diameter}")
-#     conn = "Fully connected" if islands == 1 else "Empty (no connections)" if islands == total else f"Disconnected ({islands} islands)"
-#     print(f"Graph connectivity: {conn}")
-
-network.save_network_to_csv("network-small.csv")
\ No newline at end of file
+# Seeded synthetic networks, streamed straight to CSV or a binary snapshot.
+# Users 0..n-1 are split into islands of consecutive uids. Each island gets random
+# friendships plus a few popular "hub" users, and is generated and written out on
+# its own, so memory holds one island at a time rather than the whole network.
+# Friendships between islands (hub outside links, random bridges) are few and are
+# drawn up front. The same (users, seed) always gives the same network.
+
+ISLANDS = 7 # at least this many islands
+ISLAND_SIZE = 100_000 # at most this many users per island
+PAIRS_PER_USER = 4 # random pairs drawn per user in an island (~8 friends each)
+HUBS_PER_USER = 1 / 1000 # hubs per island user (at least 1 per island)
+HUB_FRIENDS = (50, 500) # friends a hub makes in its island
+HUB_OUTSIDE = (2, 5) # and outside of it
+BRIDGES_PER_USER = 1 / 100 # random friendships across the whole network
+
+def island_bounds(n_users):
+    if n_users <= 0: return []
+    n_islands = max(ISLANDS, math.ceil(n_users / ISLAND_SIZE))
+    size = math.ceil(n_users / n_islands)
+    return [(a, min(a + size, n_users)) for a in range(0, n_users, size)]
+
+def gen_bridges(n_users, seed, islands):
+    # {island number: [(uid, friend uid)]}, each friendship listed under both ends
+    rng = random.Random(f"{seed}/bridges")
+    size = islands[0][1] if islands else 1
+    bridges = {}
+
+    def bridge(uid1, uid2):
+        if uid1 == uid2: return
+        bridges.setdefault(uid1 // size, []).append((uid1, uid2))
+        bridges.setdefault(uid2 // size, []).append((uid2, uid1))
+
+    for a, b in islands:
+        for uid in hub_uids(seed, a, b):
+            for _ in range(rng.randint(*HUB_OUTSIDE)):
+                bridge(uid, rng.randrange(n_users))
+    for _ in range(int(n_users * BRIDGES_PER_USER)):
+        bridge(rng.randrange(n_users), rng.randrange(n_users))
+    return bridges
+
+def hub_uids(seed, a, b):
+    rng = random.Random(f"{seed}/hubs/{a}")
+    return [rng.randrange(a, b) for _ in range(max(1, int((b - a) * HUBS_PER_USER)))]
+
+def gen_island(seed, a, b, bridges):
+    # yields (uid, name, sorted friend uids) for uids a..b-1
+    rng = random.Random(f"{seed}/island/{a}")
+    rand = rng.random
+    n = b - a
+    friends = [set() for _ in range(n)]
+
+    def connect(i, j):
+        if i != j:
+            friends[i].add(j)
+            friends[j].add(i)
+
+    for _ in range(n * PAIRS_PER_USER):
+        connect(int(rand() * n), int(rand() * n))
+    for uid in hub_uids(seed, a, b):
+        for _ in range(rng.randint(min(HUB_FRIENDS[0], n - 1), min(HUB_FRIENDS[1], n - 1))):
+            connect(uid - a, int(rand() * n))
+    for uid, fid in bridges:
+        friends[uid - a].add(fid - a) # may fall outside 0..n-1, shifted back below
+
+    for i in range(n):
+        yield (a + i, rng.choice(names), sorted(a + j for j in friends[i]))
+        friends[i] = None
+
+def gen_network(n_users, seed=0):
+    # yields (uid, name, sorted friend uids) for every user, in uid order
+    islands = island_bounds(n_users)
+    bridges = gen_bridges(n_users, seed, islands)
+    for i, (a, b) in enumerate(islands):
+        yield from gen_island(seed, a, b, bridges.pop(i, ()))
+
+def write_csv(path, users):
+    with open(path, mode='w') as file:
+        writer = csv.writer(file)
+        for uid, name, friends in users:
+            writer.writerow([uid, name, " ".join(map(str, friends))])
+
+def write_snapshot(path, users):
+    writer = SnapshotWriter(path)
+    for uid, name, friends in users:
+        writer.add_user(uid, name, friends)
+    writer.close()
+
+# python3 gen_network.py <USERS> <OUT-PATH> [SEED]
+
+if __name__ == "__main__":
+    if len(argv) < 3:
+        print("Generates a random network with islands and popular users, written as CSV (or a binary snapshot if OUT-PATH ends in .snap)")
+        print(f"Usage: python3 {argv[0]} <USERS> <OUT-PATH> [SEED]")
+        quit()
+
+    n_users = int(argv[1])
+    seed = int(argv[3]) if len(argv) > 3 else 0
+    users = gen_network(n_users, seed)
+    if argv[2].endswith(".snap"):
+        write_snapshot(argv[2], users)
+    else:
+        write_csv(argv[2], users)
+    print(f"Generated {n_users} users (seed {seed}) into {argv[2]}")
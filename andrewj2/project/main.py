@@ -1,6 +1,12 @@
+import sys
+import json
 from sys import argv
 from Menu import *
 from SocialNetwork import *
+from GraphStats import graph_stats, clustering_stats
+from Analytics import path_length_stats
+from QueryCache import QueryCache
+from Batch import run_batch
 
 # ============================
 #        NETWORK LOGIC
@@ -9,7 +15,8 @@ from SocialNetwork import *
 network = Network()
 runtime = {
     "user": None,
-    "use_fw": False,
+    "alg": "bfs", # distance/shortest path engine: "bfs", "fw" or "alt"
+    "cache": QueryCache(network),
 }
 
 # === Helper Functions ===
@@ -32,24 +39,39 @@ def ordinal(n: int): # credit: https://stackoverflow.com/questions/9647202/ordin
 def todo():
     mprint("TODO")
 
+def cached(query, *args):
+    return runtime["cache"].get(query, *args)
+
 def sorted_by_friends(u_list, reverse=True):
     return sorted(u_list, key=lambda u: len(u.friends), reverse=reverse)
 
 # === Options Menu ===
 
-def opt_set_use_fw(b):
-    runtime["use_fw"] = b
-    alg = "Floyd-Warshall" if b else "BFS/Dijkstra"
-    mprint(f"Now using {alg} for distance/shortest path")
+def opt_set_alg(alg):
+    runtime["alg"] = alg
+    name = {"bfs": "BFS/Dijkstra", "fw": "Floyd-Warshall", "alt": "landmarks (ALT)"}[alg]
+    mprint(f"Now using {name} for distance/shortest path")
 
 def use_fw():
-    return runtime["use_fw"]
+    return runtime["alg"] == "fw"
+
+def opt_set_storage(storage):
+    if storage == "editable": network.thaw()
+    else: network.freeze(compressed=storage == "compressed")
+    name = {"editable": "editable", "csr": "compact read-only (CSR)", "compressed": "compressed read-only (varint)"}[storage]
+    size, per_edge = network.get_storage_bytes()
+    mprint(f"Now using {name} graph storage ({size} bytes of friend lists, {per_edge:.2f} per friendship)")
+
+def opt_set_cache_size():
+    size = int(minput("Enter query cache size (0 to disable)"))
+    runtime["cache"].resize(size)
+    mprint(f"Query cache size: {size}")
 
 # === Search Menu ===
 
 def search_substr():
     s = minput("Enter search string").lower()
-    results = sorted_by_friends(filter(lambda u: s in u.name.lower(), network.get_all_users()))
+    results = network.search_users_by_name(s)
     if len(results) == 0:
         mprint(f"No results for \"{s}\"")
         return
@@ -59,7 +81,7 @@ def search_substr():
 
 def search_most_connected(least=False):
     n = int(minput("Enter how many"))
-    users = sorted_by_friends(network.get_all_users(), reverse=not least)[:n]
+    users = network.get_most_connected(n, least)
     mprint(f"{"Least" if least else "Most"}-connected Users ({n}):")
     for u in users:
         mprint(f"\t{fmt_user(u)}")
@@ -89,31 +111,17 @@ def user_display():
         return
     mprint(f"Current user: {fmt_user(u, pad_uid=False)}")
 
-def n_degrees_list_bfs(u, n):
-    users = sorted(network.bfs_traverse(u.uid, end_dist=n).items(), key=lambda it: it[1])
-    lst = []
-    for deg in range(1,n+1):
-        deg_lst = sorted_by_friends(
-            list(map(lambda id_deg: network.get_user_by_uid(id_deg[0]),
-                filter(lambda id_deg: id_deg[1] == deg,
-                    users))))
-        if len(deg_lst) > 0:
-            lst.append(deg_lst)
-    return lst
-
-def n_degrees_list_fw(u, n):
-    v_list = network.get_all_uids()
-    d_list = network.build_d_matrix_fw()[v_list.index(u.uid)]
-    lst = []
-    for deg in range(1,n+1):
-        deg_lst = []
-        for i in range(len(d_list)):
-            if d_list[i] == deg:
-                deg_lst.append(network.get_user_by_uid(v_list[i]))
-        deg_lst = sorted_by_friends(deg_lst)
-        if len(deg_lst) > 0:
-            lst.append(deg_lst)
-    return lst
+def n_degrees_list_bfs(uid, n):
+    # the BFS hands out users ring by ring, so each ring is sorted on its own
+    return [sorted_by_friends(network.get_users_by_uids(ring)) for ring in network.get_n_degree_rings(uid, n)]
+
+def n_degrees_list_fw(uid, n):
+    d_matrix = network.build_d_matrix_fw()
+    lst = [[] for _ in range(n)]
+    for i, d in enumerate(d_matrix.get_row(uid)):
+        if 1 <= d <= n:
+            lst[d-1].append(network.get_user_by_uid(d_matrix.uids[i]))
+    return [sorted_by_friends(deg_lst) for deg_lst in lst if len(deg_lst) > 0]
 
 
 def user_n_degrees():
@@ -124,7 +132,7 @@ def user_n_degrees():
     
     n = int(minput("Enter value for N"))
 
-    lst = n_degrees_list_fw(u, n) if use_fw() else n_degrees_list_bfs(u, n)
+    lst = cached(n_degrees_list_fw if use_fw() else n_degrees_list_bfs, u.uid, n)
 
     mprint(f"Selected: {u.name}")
     for i in range(len(lst)):
@@ -145,11 +153,12 @@ def user_connection_path():
     
     fid = int(minput("Enter target user ID"))
 
-    path = network.get_path_fw(u.uid, fid) if use_fw() else network.get_path_dijkstra(u.uid, fid)
+    query = {"bfs": network.get_path_dijkstra, "fw": network.get_path_fw, "alt": network.get_path_alt}[runtime["alg"]]
+    path = cached(query, u.uid, fid)
     if not path:
         mprint("No connection path found")
         return
-    path.pop(0)
+    path = path[1:]
     mprint(f"Connection path found ({len(path)} steps):")
 
     def fmt(u): return f"{fmt_uid(u.uid)}: {u.name}"
@@ -160,6 +169,26 @@ def user_connection_path():
         mprint("\t ↓")
         mprint(f"\t{fmt(next_u)}")
 
+def user_distance_estimate():
+    u = runtime["user"]
+    if not u:
+        mprint("No user selected")
+        return
+
+    fid = int(minput("Enter target user ID"))
+
+    bounds = cached(network.get_distance_bounds, u.uid, fid)
+    if bounds is None:
+        mprint("No such user")
+        return
+    lower, upper = bounds
+    if lower == math.inf:
+        mprint("No connection path exists")
+    elif lower == upper:
+        mprint(f"Distance: {lower} steps")
+    else:
+        mprint(f"Distance: {lower}-{upper} steps")
+
 def user_mutual_friends():
     u = runtime["user"]
     if not u:
@@ -169,7 +198,7 @@ def user_mutual_friends():
     fid = int(minput("Enter target user ID"))
 
     f = network.get_user_by_uid(fid)
-    mutuals = network.get_mutual_connections(u.uid, fid)
+    mutuals = cached(network.get_mutual_connections, u.uid, fid)
     if len(mutuals) == 0:
         mprint(f"No mutual friends with {f.name}")
         return
@@ -183,47 +212,87 @@ def user_friend_suggestions():
         mprint("No user selected")
         return
 
-    u_list = []
-    for uid in network.get_all_uids():
-        if uid == u.uid: continue
-        n_mutual = len(network.get_mutual_connections(u.uid, uid))
-        if n_mutual > 0: u_list.append((uid, n_mutual))
-    
+    u_list = network.get_friend_suggestions(u.uid, 10)
     if len(u_list) == 0:
-        mprint("No friend recommendations") # todo: search 2nd-degree?
+        mprint("No friend recommendations")
         return
     
     mprint(f"Friend suggestions for {u.name}:")
-    u_list = sorted(
-        map(lambda it: (network.get_user_by_uid(it[0]), it[1]), u_list),
-            key=lambda it: (it[1], len(it[0].friends)), reverse=True)[:10]
-    for user,m in u_list:
+    for uid,m in u_list:
+        user = network.get_user_by_uid(uid)
         mprint(f"\t{fmt_uid(user.uid)}: {user.name} ({len(user.friends)} friends, {m} mutual friends)")
 
 
 # === Stats Menu ===
 
-def stats_graph():
-    total = network.get_total_users()
-    visited = set()
-    islands = 0
-    diameter = 0
-    while len(visited) < network.get_total_users():
-        i = 0
-        while i in visited or not network.get_user_by_uid(i):
-            i += 1
-            continue
-
-        distances = network.bfs_traverse(i, visit_fn=lambda u: visited.add(u.uid))
-        islands += 1
-
-        d = sorted(distances.values(), reverse=True)[0]
-        if diameter < d: diameter = d
+def stats_graph(samples=None):
+    stats = graph_stats(network.get_csr(), samples)
+    total = stats["users"]
+    islands = stats["components"]
 
     conn = "Fully connected" if islands == 1 else "Empty (no connections)" if islands == total else f"Disconnected ({islands} islands)"
 
-    mprint(f"Graph diameter: {diameter}")
+    if samples:
+        lb, ub = stats["diameter_bounds"]
+        mprint(f"Graph diameter: {lb}" if lb == ub else f"Graph diameter: {lb}-{ub} (estimated from {samples} samples)")
+    else:
+        mprint(f"Graph diameter: {stats["diameter"]}")
     mprint(f"Graph connectivity: {conn}")
+    mprint("Island sizes (users: islands):")
+    sizes = list(stats["component_sizes"].items())
+    for i in range(len(sizes)):
+        mprint(f"\t{sizes[i][0]}: {sizes[i][1]}")
+        if i >= 4 and len(sizes)-i > 2:
+            mprint(f"\t...{len(sizes)-i-1} more...")
+            break
+
+def stats_graph_sampled():
+    stats_graph(samples=int(minput("Enter number of samples")))
+
+def stats_paths(samples=None):
+    stats = path_length_stats(network, samples)
+    sampled = "histogram_bounds" in stats
+    if sampled:
+        mprint(f"Estimated from {stats["sources"]} of {stats["users"]} users ({stats["confidence"]:.0%} confidence):")
+        hist = stats["histogram_bounds"]
+        closeness, lo, hi = stats["closeness_bounds"]
+        mean, mean_lo, mean_hi = stats["mean_distance_bounds"]
+        mprint(f"Avg. path length: {mean:.3f} ({mean_lo:.3f}-{mean_hi:.3f})")
+    else:
+        hist = stats["histogram"]
+        closeness = stats["closeness"]
+        mprint(f"Avg. path length: {stats["mean_distance"]:.3f}")
+
+    mprint("Path lengths (length: pairs of users):")
+    for d, pairs in hist.items():
+        mprint(f"\t{d}: {f"~{round(pairs[0])} ({round(pairs[1])}-{round(pairs[2])})" if sampled else pairs}")
+    mprint(f"\tunreachable: {stats["unreachable_pairs"]}")
+
+    mprint("Most central users (closeness):")
+    known = lambda i: closeness[i] if not math.isnan(closeness[i]) else -1
+    for i in heapq.nlargest(5, range(stats["users"]), key=known):
+        bounds = f" ({lo[i]:.4f}-{hi[i]:.4f})" if sampled else ""
+        mprint(f"\t{fmt_user(network.get_user_by_uid(stats["uids"][i]))}: {closeness[i]:.4f}{bounds}")
+
+def stats_paths_sampled():
+    stats_paths(samples=int(minput("Enter number of samples")))
+
+def stats_clustering():
+    stats = clustering_stats(network.get_csr())
+    mprint(f"Triangles: {stats["triangles"]}")
+    mprint(f"Transitivity (closed friend-of-friend pairs): {stats["transitivity"]:.4f}")
+    mprint(f"Avg. clustering coefficient: {stats["average_clustering"]:.4f}")
+
+    uids, counts = network.get_all_uids(), stats["triangle_counts"]
+    mprint("Users in the most triangles:")
+    for i in heapq.nlargest(5, range(len(uids)), key=counts.__getitem__):
+        mprint(f"\t{fmt_user(network.get_user_by_uid(uids[i]))}: {counts[i]} triangles, {stats["clustering"][i]:.3f} clustering")
+
+def stats_cache():
+    stats = runtime["cache"].get_stats()
+    mprint(f"Query cache: {stats["entries"]}/{stats["size"]} entries")
+    mprint(f"Hits: {stats["hits"]}, Misses: {stats["misses"]} ({stats["hit_rate"]:.1%} hit rate)")
+    mprint(f"Emptied by network changes: {stats["invalidations"]} times")
 
 def stats_users():
     n_users = network.get_total_users()
@@ -231,6 +300,8 @@ def stats_users():
     mprint(f"Total Users: {n_users}")
     mprint(f"Total Connections: {n_conns}")
     mprint(f"Avg. Friends Per User: {n_conns * 2 / n_users}")
+    size, per_edge = network.get_storage_bytes()
+    mprint(f"Friend List Storage ({network.get_storage()}): {size} bytes, {per_edge:.2f} per friendship")
 
 
 # ============================
@@ -239,8 +310,13 @@ def stats_users():
 
 main_menu = [
     ("Options", ("options", [
-        ("Distance algorithm -> BFS/Dijkstra", lambda: opt_set_use_fw(False)),
-        ("Distance algorithm -> FW", lambda: opt_set_use_fw(True)),
+        ("Distance algorithm -> BFS/Dijkstra", lambda: opt_set_alg("bfs")),
+        ("Distance algorithm -> FW", lambda: opt_set_alg("fw")),
+        ("Distance algorithm -> Landmarks (ALT)", lambda: opt_set_alg("alt")),
+        ("Graph storage -> Editable", lambda: opt_set_storage("editable")),
+        ("Graph storage -> Compact (CSR)", lambda: opt_set_storage("csr")),
+        ("Graph storage -> Compressed (varint)", lambda: opt_set_storage("compressed")),
+        ("Query cache size", opt_set_cache_size),
     ])),
     ("Users", ("users", [
         ("Search users", ("search", [
@@ -251,13 +327,19 @@ main_menu = [
         ("Select user", user_select),
         ("Display current user", user_display),
         ("Connection path", user_connection_path),
+        ("Distance estimate (landmarks)", user_distance_estimate),
         ("Users within N degrees", user_n_degrees),
         ("Mutual friends", user_mutual_friends),
         ("Friend suggestions", user_friend_suggestions),
     ])),
     ("Statistics", ("stats", [
         ("Graph statistics", stats_graph),
+        ("Graph statistics (sampled diameter)", stats_graph_sampled),
+        ("Path lengths & closeness", stats_paths),
+        ("Path lengths & closeness (sampled)", stats_paths_sampled),
+        ("Triangles & clustering", stats_clustering),
         ("User statistics", stats_users),
+        ("Query cache statistics", stats_cache),
     ])),
 ]
 
@@ -266,22 +348,41 @@ main_menu = [
 #        RUN PROGRAM
 # ----------------------------
 
-if len(argv) < 2:
-    print("This program reads a social network graph stored in")
-    print("a CSV file and provides tools to analyze the data\n")
-    print(f"Usage: python3 {argv[0]} <CSV-PATH>")
-    quit()
-
-print("\n=== Social Network Analyzer ===\n")
-
-loaded, msg = network.load_network_from_csv(argv[1])
-if loaded:
-    mprint(f"Network load: {msg}")
-    print()
-else:
-    mprint(f"Network load error: {msg}")
-    mquit()
-
-try: Menu("main", main_menu).run()
-except KeyboardInterrupt: print()
-mquit()
\ No newline at end of file
+# the analytics process pool may re-import this module in its workers
+if __name__ == "__main__":
+    if len(argv) < 2:
+        print("This program reads a social network graph stored in")
+        print("a CSV file (or binary snapshot, see Snapshot.py) and")
+        print("provides tools to analyze the data\n")
+        print(f"Usage: python3 {argv[0]} <CSV-OR-SNAPSHOT-PATH> [--batch <QUERIES-PATH>|-]")
+        print("  --batch runs a file of queries (or stdin for -) instead of the menus,")
+        print("  writing JSON lines to stdout and a timing summary to stderr")
+        quit()
+
+    if len(argv) > 2 and argv[2] == "--batch":
+        loaded, msg = network.load_network(argv[1])
+        if not loaded:
+            print(f"Network load error: {msg}", file=sys.stderr)
+            quit(1)
+        queries_path = argv[3] if len(argv) > 3 else "-"
+        if queries_path == "-":
+            summary = run_batch(network, sys.stdin)
+        else:
+            with open(queries_path, mode='r') as file:
+                summary = run_batch(network, file)
+        print(json.dumps(summary, indent=2), file=sys.stderr)
+        quit()
+
+    print("\n=== Social Network Analyzer ===\n")
+
+    loaded, msg = network.load_network(argv[1])
+    if loaded:
+        mprint(f"Network load: {msg}")
+        print()
+    else:
+        mprint(f"Network load error: {msg}")
+        mquit()
+
+    try: Menu("main", main_menu).run()
+    except KeyboardInterrupt: print()
+    mquit()
\ No newline at end of file
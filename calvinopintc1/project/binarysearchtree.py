@@ -3,7 +3,7 @@
 # BST for sorting by numerical values
 # ======================
 
-from verbose import verbose_log  # keep the same import so this file stays compatible with the project
+from verbose import verbose_log, tracer, STEP  # keep the same import so this file stays compatible with the project
 
 
 class BinarySearchTreeNode:
@@ -51,31 +51,38 @@ class BinarySearchTree:
             key = (0, song.title)  # this is a fallback so the code won't break if a non compatible attribute somehow got passed
 
         new_node = BinarySearchTreeNode(key, song)  # finally, make and insert the node to the tree
+        tracing = tracer.level >= STEP
 
         # If there is no root yet (tree is empty) the new node becomes the root
         if self.root is None:
             self.root = new_node  # set the first node as the root of the tree
-            verbose_log("Inserted root node in BinarySearchTree: " + str(song))  # log what we inserted
+            if tracing:
+                tracer.log(STEP, "Inserted root node in BinarySearchTree: %s", song)  # log what we inserted (str(song) only runs when tracing)
             return  # insertion is done
 
         # For when the tree is not empty:
         current_node = self.root  # start from the root because every BST insert begins there
         while current_node is not None: # while loop will keep going until the node is inserted basically (a spot is found for the node)
-            verbose_log("Comparing new node key " + str(key) + " to existing node key " + str(current_node.key) + " for BST insertion.")  # show the comparison step-by-step
-            
+            if tracing:
+                tracer.log(STEP, "Comparing new node key %s to existing node key %s for BST insertion.", key, current_node.key)  # show the comparison step-by-step
+                tracer.count("comparisons")
+                tracer.count("nodes_visited")
+
             # these are the actual steps to follow to insert
             if key < current_node.key:
                 # New key is "smaller", so we need to go left (BST rules)
                 if current_node.left is None:
                     current_node.left = new_node  # found an empty left spot, so insert here
-                    verbose_log("Inserted new node to the LEFT of current node.")  # log the direction chosen so we can check it works
+                    if tracing:
+                        tracer.log(STEP, "Inserted new node to the LEFT of current node.")  # log the direction chosen so we can check it works
                     return  # insert is done
                 current_node = current_node.left  # keep going to the left until we find an empty spot
             else:
                 # New key is "greater or equal", so we go right
                 if current_node.right is None:
                     current_node.right = new_node  # found an empty right spot, so insert here
-                    verbose_log("Inserted new node to the RIGHT of current node.")  # log the direction chosen
+                    if tracing:
+                        tracer.log(STEP, "Inserted new node to the RIGHT of current node.")  # log the direction chosen
                     return  # insert is done
                 current_node = current_node.right  # keep going right until we find an empty spot
 
@@ -3,126 +3,176 @@
 # ======================
 
 from collections import defaultdict, deque  # supports queue behavior for BFS
-from verbose import verbose_log  # verbose logging utility used throughout the project
+from verbose import verbose_log, tracer, STEP  # verbose logging utility used throughout the project
 #from models import Song  # imported for type context (Song objects are used in build_from_songs)
 
 
 class SongGraph:
     """
-    Simple undirected similarity graph.
+    Undirected similarity graph, stored implicitly as a bipartite graph.
 
     Vertices: song_id strings
     Edges: songs that share the same artist or the same genre
 
+    Instead of storing an edge for every pair of similar songs (one popular genre alone
+    would need O(n^2) edges), every song is linked to one artist vertex and one genre vertex.
+    Two songs are neighbors exactly when they share one of those vertices, so a song's
+    neighbors are expanded lazily from its artist's and genre's song lists during BFS.
+
     Attributes:
-        adjacency_list: dictionary mapping song_id to list of neighbor song_ids
+        songs_by_artist: dictionary mapping artist to list of song_ids (in insertion order)
+        songs_by_genre: dictionary mapping genre to list of song_ids (in insertion order)
+        song_groups: dictionary mapping song_id to its (artist, genre) pair
     """
 
     def __init__(self):
-        self.adjacency_list = defaultdict(list)  # use lists for neighbors to match adjacency-list representation
+        self.songs_by_artist = defaultdict(list)  # artist vertex -> the songs linked to it
+        self.songs_by_genre = defaultdict(list)  # genre vertex -> the songs linked to it
+        self.song_groups = {}  # song vertex -> its artist and genre vertices
         verbose_log("Initialized empty SongGraph.")
 
-    def add_edge(self, song_id_a, song_id_b):
+    def add_song(self, song):
         """
-        Add an undirected edge between two songs.
+        Link a song to its artist and genre vertices. O(1), so songs can also be added after the build.
 
-        song_id_a: string
-        song_id_b: string
+        song: Song
         """
-        if song_id_b not in self.adjacency_list[song_id_a]:  # avoid duplicate neighbor entries so the adjacency list stays clean
-            self.adjacency_list[song_id_a].append(song_id_b)  # add B to A's neighbor list (one direction of undirected edge)
-        if song_id_a not in self.adjacency_list[song_id_b]:  # avoid duplicate neighbor entries in the reverse direction
-            self.adjacency_list[song_id_b].append(song_id_a)  # add A to B's neighbor list (other direction of undirected edge)
+        if song.song_id in self.song_groups:  # a song is only linked once, so its neighbor lists never repeat it
+            return
+        self.song_groups[song.song_id] = (song.artist, song.genre)  # remember which two vertices to expand for this song
+        self.songs_by_artist[song.artist].append(song.song_id)  # edge from the song to its artist vertex
+        self.songs_by_genre[song.genre].append(song.song_id)  # edge from the song to its genre vertex
 
     def build_from_songs(self, song_list):
         """
-        Build similarity edges based on:
+        Build the similarity graph based on:
         - Same artist
         - Same genre
 
+        Runs in O(n): each song only gets linked to its artist and its genre.
+
         song_list: list of Song
         """
         verbose_log("Building song similarity graph based on artist and genre.")
 
-        songs_grouped_by_artist = defaultdict(list)  # group songs by artist to connect artists's songs together
-        songs_grouped_by_genre = defaultdict(list)  # group songs by genre to connect songs by genre
-
+        self.songs_by_artist.clear()  # start from an empty graph so rebuilding never links a song twice
+        self.songs_by_genre.clear()
+        self.song_groups.clear()
         for song in song_list:  # go through every Song so we can place it into the correct group
-            songs_grouped_by_artist[song.artist].append(song.song_id)  # this will set it up so the key is the artist and all songs by that artist are under that key
-            songs_grouped_by_genre[song.genre].append(song.song_id)  # this sets it up so the key is the genre and all songs under that genre are the values
-        
-        # now connect songs with the same artist
-        for songs_by_same_artist in songs_grouped_by_artist.values():  # each value is a list of the song ids that share one artist
-            for i in range(len(songs_by_same_artist)):  # pick the first song as a vertex to connect
-                for j in range(i + 1, len(songs_by_same_artist)):  # pick the second song, index_a+1 to avoid repeats
-                    self.add_edge(songs_by_same_artist[i], songs_by_same_artist[j])  # this adds an undirected edge between the pair
-
-        # and connect songs with the same genre
-        for songs_with_same_genre in songs_grouped_by_genre.values():  # each value is a list of the songs ids that have the same genre
-            for i in range(len(songs_with_same_genre)):  # pick the first song as a vertex to connect
-                for j in range(i + 1, len(songs_with_same_genre)):  # choose the second song after index_a
-                    self.add_edge(songs_with_same_genre[i], songs_with_same_genre[j])  # add the undirected edge
+            self.add_song(song)
 
         verbose_log(
-            "SongGraph built with "  
-            + str(len(self.adjacency_list)) 
-            + " nodes connected by similarity edges."  
+            "SongGraph built with "
+            + str(len(self.song_groups))
+            + " songs linked to "
+            + str(len(self.songs_by_artist))
+            + " artists and "
+            + str(len(self.songs_by_genre))
+            + " genres."
         )
 
-    def recommend_using_breadth_first_search(self, start_song_id, maximum_depth=2, maximum_results=5): 
+    def has_neighbors(self, song_id):
+        """
+        Check if a song shares its artist or its genre with any other song.
+
+        song_id: string
+        returns: True if the song has at least one neighbor
+        """
+        if song_id not in self.song_groups:  # songs that were never added have no edges at all
+            return False
+        artist, genre = self.song_groups[song_id]
+        return len(self.songs_by_artist[artist]) > 1 or len(self.songs_by_genre[genre]) > 1
+
+    def neighbors(self, song_id):
+        """
+        List a song's neighbors: songs by the same artist first, then songs of the same genre
+        that are not by that artist, each in the order they were added.
+
+        song_id: string
+        returns: list of song_id strings
+        """
+        if song_id not in self.song_groups:
+            return []
+        artist, genre = self.song_groups[song_id]
+        neighbor_song_ids = [other for other in self.songs_by_artist[artist] if other != song_id]  # same artist
+        seen_song_ids = set(neighbor_song_ids)
+        seen_song_ids.add(song_id)
+        for other in self.songs_by_genre[genre]:  # same genre, skipping songs already listed through the artist
+            if other not in seen_song_ids:
+                neighbor_song_ids.append(other)
+        return neighbor_song_ids
+
+    def recommend_using_breadth_first_search(self, start_song_id, maximum_depth=2, maximum_results=5):
         # for recs, we only want to visit up to a certain # of "visitors" instead of every visitor so we only make the more relevant recommendations
         """
         Perform BFS from start_song_id to find recommended songs.
 
+        The neighbors of each dequeued song are expanded lazily from its artist vertex and then its
+        genre vertex. Once a vertex has been expanded every song linked to it is discovered, so each
+        artist and genre is only expanded once and the traversal costs O(V) instead of O(V + E).
+
         start_song_id: string (a song)
         maximum_depth: integer (maximum BFS depth)
         maximum_results: integer (maximum number of recommendations)
         returns: list of song_id strings
         """
-        if start_song_id not in self.adjacency_list:  # if the start node is not in the graph, BFS can't begin
+        if not self.has_neighbors(start_song_id):  # if the start node has no edges in the graph, BFS can't begin
             verbose_log(
                 "Starting song id "
-                + start_song_id 
+                + start_song_id
                 + " not present in SongGraph; no recommendations will be generated."
             )
             return []  # no start node means no recommendations :(
 
         visited_song_ids = set([start_song_id])  # discovered set starts with the start node
+        expanded_artists = set()  # artist vertices whose songs have all been discovered already
+        expanded_genres = set()  # genre vertices whose songs have all been discovered already
         frontier_queue = deque([(start_song_id, 0)])  # this is the frontier queue, deque is part of the collections import and allows a double sided queue which is good for removing and adding to the queue as is needed for BFS
         recommended_song_ids = []  # list to save recommendations in the order we discover them
 
         verbose_log(
-            "Starting BFS recommendations from song id "  
-            + start_song_id 
-            + " (maximum_depth="  
-            + str(maximum_depth)  
-            + ")." 
+            "Starting BFS recommendations from song id "
+            + start_song_id
+            + " (maximum_depth="
+            + str(maximum_depth)
+            + ")."
         )
 
+        tracing = tracer.level >= STEP
+
         while frontier_queue and len(recommended_song_ids) < maximum_results:  # BFS will loop while frontier is not empty and we still need results
             current_song_id, current_depth = frontier_queue.popleft()  # dequeue the next vertex to visit
+            if tracing:
+                tracer.count("nodes_visited")
 
             if current_depth >= maximum_depth:  # if we've reached the max depth, don't keep going
                 pass  # don't go because BFS would go deeper than allowed
 
-            for neighbor_song_id in self.adjacency_list[current_song_id]:  # iterate through adjacency list neighbors
-                if neighbor_song_id not in visited_song_ids:  # only process undiscovered nodes so we don't loop forever
-                    visited_song_ids.add(neighbor_song_id)  # vertex becomes part of discovered
-                    frontier_queue.append((neighbor_song_id, current_depth + 1))  # enqueue next vertex with depth+1 to explore next layer
-                    recommended_song_ids.append(neighbor_song_id)  # append the recommendation to our list from earlier
-                    verbose_log(
-                        "BFS discovered neighbor "
-                        + neighbor_song_id  
-                        + " at depth "  
-                        + str(current_depth + 1)  
-                        + "." 
-                    )
-                    if len(recommended_song_ids) >= maximum_results:  # if we reached the requested number of recommendations stop 
-                        break 
-                    
+            artist, genre = self.song_groups[current_song_id]
+            neighbor_groups = []  # the song lists still worth scanning: same artist first, then same genre
+            if artist not in expanded_artists:
+                expanded_artists.add(artist)
+                neighbor_groups.append(self.songs_by_artist[artist])
+            if genre not in expanded_genres:
+                expanded_genres.add(genre)
+                neighbor_groups.append(self.songs_by_genre[genre])
+
+            for neighbor_song_ids in neighbor_groups:
+                for neighbor_song_id in neighbor_song_ids:  # iterate through the songs sharing this vertex
+                    if neighbor_song_id not in visited_song_ids:  # only process undiscovered nodes so we don't loop forever
+                        visited_song_ids.add(neighbor_song_id)  # vertex becomes part of discovered
+                        frontier_queue.append((neighbor_song_id, current_depth + 1))  # enqueue next vertex with depth+1 to explore next layer
+                        recommended_song_ids.append(neighbor_song_id)  # append the recommendation to our list from earlier
+                        if tracing:
+                            tracer.log(STEP, "BFS discovered neighbor %s at depth %d.", neighbor_song_id, current_depth + 1)
+                        if len(recommended_song_ids) >= maximum_results:  # if we reached the requested number of recommendations stop
+                            break
+                if len(recommended_song_ids) >= maximum_results:
+                    break
+
         verbose_log(
-            "BFS recommendation traversal produced "  
-            + str(len(recommended_song_ids))  
-            + " candidate songs."  
+            "BFS recommendation traversal produced "
+            + str(len(recommended_song_ids))
+            + " candidate songs."
         )
         return recommended_song_ids  # return the list recommended song ids
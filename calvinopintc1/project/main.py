@@ -13,12 +13,15 @@ import time
 from collections import defaultdict, deque
 
 # Module imports
-from verbose import verbose_log, set_verbose
+from verbose import verbose_log, set_verbose, tracer, STEP
 
 from models import Song, Playlist, format_duration
 from sorting import partition_song_list, quicksort_song_list, merge_songs, merge_sort_song_list
-from searching import linear_search_songs, linear_search_songs_for_partial_title, binary_search_songs_by_title
+from searching import linear_search_songs, linear_search_songs_for_partial_title
+from sortedsonglist import SortedSongList
+from trigramindex import TrigramIndex
 from graph import SongGraph
+from recommender import SongRecommender
 from queues import ArrayQueue
 from binarysearchtree import BinarySearchTree, BinarySearchTreeNode
 
@@ -66,6 +69,8 @@ BLUE    = "\033[94m"
 RESET = "\033[0m"
 #endregion ASCII_colors
 
+TRACE_FILE_PATH = "trace.jsonl" # where trace records go when the trace file is toggled on
+
 #region Menu
 # ======================
 # CLI / Menu
@@ -85,6 +90,7 @@ def print_main_menu():
     print("5. Compare sorting performance")
     print("6. Get recommendations")
     print("7. Toggle verbose mode on/off")
+    print("8. Toggle trace file on/off (" + TRACE_FILE_PATH + ")")
     print(f"0. {RED}Exit{RESET}")
 
 
@@ -100,6 +106,7 @@ def search_menu(library):
     print("2. Artist")
     print("3. Genre")
     print("4. Partial title (substring)")
+    print("5. Title prefix (sorted title index)")
     print()
     search_choice = input("Select: ").strip()
 
@@ -155,12 +162,32 @@ def search_menu(library):
 
     elif search_choice == "4":
         substring = input("Substring: ")
-        results = library.search_partial_title(substring) # call the function that will go through all songs to check if the substring is in the title
-        if not results:
+        # same as exact title: both searches run so their number of comparisons and elapsed time can be compared
+        (
+            linear_matches,
+            linear_comparisons,
+            linear_elapsed_time,
+            indexed_matches,
+            indexed_comparisons,
+            indexed_elapsed_time
+        ) = library.compare_partial_title_search(substring)
+        if not indexed_matches:
             print("No songs matched that substring.")
         else:
-            for song in results:
+            for song in indexed_matches:
                 print(" ", song) # prints out every song that contains the search substring
+        print("\nLinear comparisons: " + str(linear_comparisons))
+        print("Linear elapsed time: " + str(linear_elapsed_time))
+        print("Trigram index comparisons: " + str(indexed_comparisons))
+        print("Trigram index elapsed time: " + str(indexed_elapsed_time))
+    elif search_choice == "5":
+        prefix = input("Title starts with: ")
+        results = library.search_title_prefix(prefix) # range query on the sorted title index
+        if not results:
+            print("No song titles start with that prefix.")
+        else:
+            for song in results:
+                print(" ", song) # prints out every song whose title starts with the prefix, in title order
     else:
         print(f"{RED}Invalid choice.{RESET}")
 
@@ -303,9 +330,7 @@ def playlist_menu(library):
                 title = input("Enter the name of a song, or type 'done' to finish: > ").strip()
                 if title.lower() == "done":
                     break
-                song, _ , _ = binary_search_songs_by_title(
-                    library.sorted_songs_by_title_cache, title
-                )
+                song, _ , _ = library.sorted_songs_by_title.find(title.lower())
                 if song:
                     #add the song and also prompt the user with song recommendations based on the song they just added
                     playlist.add_song(song)
@@ -383,7 +408,22 @@ def recommendations_menu(library):
     """
     print()
     base_title = input("Full song title for recommendations: ") # prompt user for a song they'd want recommendations for
-    recommended_songs = library.recommend_from_title(base_title) # call the recommend song function
+
+    print()
+    print("Choose recommendation algorithm:")
+    print()
+    print("1. Breadth-first Search (similarity graph)")
+    print("2. Scored top-k (shared artist, genre, rating and play count)")
+    algorithm_choice = input("\nSelect: ").strip()
+
+    if algorithm_choice == "1":
+        algorithm = "bfs"
+    elif algorithm_choice == "2":
+        algorithm = "scored"
+    else:
+        print(f"{RED}Invalid algorithm choice.{RESET}")
+        return
+    recommended_songs = library.recommend_from_title(base_title, algorithm=algorithm) # call the recommend song function
     if not recommended_songs: 
         return # if it is none then end
     print("\nRecommended songs:")
@@ -435,8 +475,10 @@ class MusicLibrary():
         songs_by_id: dictionary from song_id string to Song
         songs_by_artist: dictionary from artist string to list of Song
         songs_by_genre: dictionary from genre string to list of Song
-        sorted_songs_by_title_cache: list of Song sorted by title
+        sorted_songs_by_title: SortedSongList of Song sorted by title
+        title_trigram_index: TrigramIndex over titles, for substring search
         song_similarity_graph: SongGraph instance
+        song_recommender: SongRecommender instance (scored recommendations)
         playlists: dictionary from playlist name to Playlist
     """
 
@@ -446,11 +488,16 @@ class MusicLibrary():
         self.songs_by_artist = defaultdict(list)
         self.songs_by_genre = defaultdict(list)
 
-        # For binary search by title, need to keep a sorted list by title in order to use binary search as a search algorithm
-        self.sorted_songs_by_title_cache = []
+        # For binary search by title, need to keep songs sorted by title in order to use binary search as a search algorithm
+        # (a sorted block list, so adding a song doesn't mean re-sorting the whole library)
+        self.sorted_songs_by_title = SortedSongList(self._key_title_lower)
+
+        # For substring search by title, an index of every title's trigrams so only a few titles need checking
+        self.title_trigram_index = TrigramIndex()
 
         # Graph for recommendations
         self.song_similarity_graph = SongGraph()
+        self.song_recommender = SongRecommender()
 
         # Playlists
         self.playlists = {}
@@ -548,10 +595,12 @@ class MusicLibrary():
                 songs_loaded_count += 1 # increment counter for songs loaded
 
         verbose_log("Finished reading " + str(songs_loaded_count) + " songs from CSV.")
-        self._rebuild_sorted_title_cache() # rebuild sorted title cache
         self.song_similarity_graph.build_from_songs(
             list(self.songs_by_id.values()) # pass list of songs to build a song graph
         )
+        self.song_recommender.build_from_songs(
+            list(self.songs_by_id.values()) # pass list of songs to bucket them for scored recommendations
+        )
         verbose_log(
             "MusicLibrary now contains "
             + str(len(self.songs_by_id))
@@ -564,26 +613,16 @@ class MusicLibrary():
 
         song: Song
         """
+        replaced_song = self.songs_by_id.get(song.song_id)
+        if replaced_song:
+            self.sorted_songs_by_title.remove(replaced_song) # a song with the same id is replaced, like in songs_by_id
         self.songs_by_id[song.song_id] = song # index by id
         self.songs_by_artist[song.norm_artist].append(song) # index by artist
         self.songs_by_genre[song.norm_genre].append(song) # index by genre
-        verbose_log(
-            "Indexed song '"
-            + song.title
-            + "' by id, artist, and genre in the library."
-        )
-
-    def _rebuild_sorted_title_cache(self):
-        """
-        Rebuild the cached title-sorted list used for binary search.
-        """
-        self.sorted_songs_by_title_cache = list(self.songs_by_id.values()) # get all songs
-        self.sorted_songs_by_title_cache.sort(key=self._key_title_lower) # sort by title (case-insensitive)
-        verbose_log(
-            "Rebuilt sorted-by-title cache for binary search, containing "
-            + str(len(self.sorted_songs_by_title_cache))
-            + " songs."
-        )
+        self.title_trigram_index.add_song(song) # index by title trigrams
+        self.sorted_songs_by_title.add(song) # insert in title order, O(log n) comparisons
+        if tracer.level >= STEP: # called once per loaded song, so only build the message when tracing
+            tracer.log(STEP, "Indexed song '%s' by id, artist, genre, and title trigrams in the library.", song.title)
 
     # ---------- Display ----------
 
@@ -593,17 +632,19 @@ class MusicLibrary():
 
         limit: integer
         """
-        song_list = list(self.songs_by_id.values()) # get all songs
-        song_list.sort(key=self._key_title_lower) # sort by title (case-insensitive)
         print(
             "\nLibrary contains "
-            + str(len(song_list))
+            + str(len(self.sorted_songs_by_title))
             + " songs. Showing up to "
             + str(limit)
             + ":\n"
         )
-        for song in song_list[:limit]: # print each song up to the limit
+        shown_count = 0
+        for song in self.sorted_songs_by_title: # already sorted by title (case-insensitive)
+            if shown_count == limit: # print each song up to the limit
+                break
             print(" ", song)
+            shown_count += 1
 
     # ---------- Search ----------
 
@@ -615,7 +656,7 @@ class MusicLibrary():
         returns: (linear_matches, linear_comparisons, binary_matches, binary_comparisons)
         """
 
-        song_list = list(self.songs_by_id.values()) # get all songs
+        song_list = self.songs_by_id.values() # all songs, no copy needed since linear search only iterates
 
         verbose_log(
             "Initiating EXACT TITLE search for '"
@@ -626,14 +667,16 @@ class MusicLibrary():
         # calls are made to linear & binary search for the purpose of comparing searching algorithms
 
         # linear search
+        tracer.reset_counters()
         linear_matches, linear_comparisons, linear_elapsed_time = linear_search_songs(
             song_list, title #match_function
         )
+        tracer.report_counters("Linear search")
 
-        # binary search (on sorted title cache)
-        binary_song, binary_comparisons, binary_elapsed_time = binary_search_songs_by_title(
-            self.sorted_songs_by_title_cache, title
-        )
+        # binary search (on the sorted title index)
+        tracer.reset_counters()
+        binary_song, binary_comparisons, binary_elapsed_time = self.sorted_songs_by_title.find(title.lower())
+        tracer.report_counters("Binary search")
         if binary_song:
             binary_matches = [binary_song]
         else:
@@ -665,23 +708,20 @@ class MusicLibrary():
 
     def search_partial_title(self, substring):
         """
-        Perform a substring search on titles using linear search.
+        Perform a substring search on titles using the trigram index.
 
         substring: string
         returns: list of Song
         """
         substring_norm = substring.lower() # normalize for case-insensitive search
-        song_list = list(self.songs_by_id.values()) # get all songs
 
         verbose_log(
             "Starting PARTIAL TITLE substring search for '"
             + substring
             + "'."
         )
-        # make the call to linear search, ie. the function that goes through all items and returns all where the substring is in the title
-        matching_songs, number_of_comparisons, _ = linear_search_songs_for_partial_title(
-            song_list, substring_norm 
-        )
+        # look the substring up in the trigram index, which only checks the titles sharing its rarest trigram
+        matching_songs, number_of_comparisons, _ = self.title_trigram_index.search(substring_norm)
         verbose_log(
             "Partial title search completed with "
             + str(number_of_comparisons)
@@ -691,6 +731,46 @@ class MusicLibrary():
         )
         return matching_songs
 
+    def compare_partial_title_search(self, substring):
+        """
+        Perform both linear and trigram index substring searches on titles.
+
+        substring: string
+        returns: (linear_matches, linear_comparisons, linear_elapsed_time, indexed_matches, indexed_comparisons, indexed_elapsed_time)
+        """
+        substring_norm = substring.lower() # normalize for case-insensitive search
+        song_list = self.songs_by_id.values() # all songs, no copy needed since linear search only iterates
+
+        verbose_log(
+            "Initiating PARTIAL TITLE search for '"
+            + substring
+            + "' using both linear search and the trigram index."
+        )
+
+        # linear search, ie. the function that goes through all items and returns all where the substring is in the title
+        tracer.reset_counters()
+        linear_matches, linear_comparisons, linear_elapsed_time = linear_search_songs_for_partial_title(
+            song_list, substring_norm
+        )
+        tracer.report_counters("Linear search")
+
+        # trigram index search
+        tracer.reset_counters()
+        indexed_matches, indexed_comparisons, indexed_elapsed_time = self.title_trigram_index.search(substring_norm)
+        tracer.report_counters("Trigram index search")
+
+        return linear_matches, linear_comparisons, linear_elapsed_time, indexed_matches, indexed_comparisons, indexed_elapsed_time
+
+    def search_title_prefix(self, prefix):
+        """
+        Find every song whose title starts with prefix, using a range query on the sorted title index.
+
+        prefix: string
+        returns: list of Song, sorted by title
+        """
+        verbose_log("Performing sorted title index prefix lookup for '" + prefix + "'.")
+        return self.sorted_songs_by_title.prefix_range(prefix.lower())
+
     # ---------- Sorting ----------
 
     def sort_library(self, attribute, algorithm):
@@ -715,6 +795,7 @@ class MusicLibrary():
             + " songs."
         )
 
+        tracer.reset_counters() # comparisons, swaps and visited nodes of this sort only
         start_time = time.perf_counter()
 
         if algorithm == "quick":
@@ -743,6 +824,7 @@ class MusicLibrary():
             + f"{elapsed_seconds:.6f}"
             + " seconds."
         )
+        tracer.report_counters("Sorting by '" + attribute + "' using '" + algorithm + "'")
         return song_list, elapsed_seconds
 
     def compare_sort_performance(self, attribute, sizes):
@@ -772,6 +854,7 @@ class MusicLibrary():
 
             # Quicksort
             quicksort_song_list_copy = subset_song_list.copy()
+            tracer.reset_counters()
             start_time = time.perf_counter()
             quicksort_song_list(
                 quicksort_song_list_copy,
@@ -780,9 +863,11 @@ class MusicLibrary():
                 key_function
             )
             quicksort_elapsed = time.perf_counter() - start_time
+            tracer.report_counters("Quicksort on " + str(size) + " songs")
 
             # Merge sort
             merge_sort_song_list_copy = subset_song_list.copy()
+            tracer.reset_counters()
             start_time = time.perf_counter()
             merge_sort_song_list(
                 merge_sort_song_list_copy,
@@ -791,6 +876,7 @@ class MusicLibrary():
                 key_function
             )
             merge_sort_elapsed = time.perf_counter() - start_time
+            tracer.report_counters("Merge sort on " + str(size) + " songs")
 
             print(
                 f"{size:4d} items: "
@@ -900,18 +986,20 @@ class MusicLibrary():
             current_song = playback_queue.dequeue()
             #add to the play_count of every song "played" from the playlist
             current_song.play_count += 1
+            self.song_recommender.song_played(current_song) # play counts are part of the recommendation scores
 
             print(f"[NOW PLAYING] '{current_song.title}' - {current_song.artist}/[{format_duration(current_song.duration_in_seconds)}] - [PLAY HISTORY] 'Played {str(current_song.play_count)} times.'") 
   
 
     # ---------- Recommendations ----------
 
-    def recommend_from_title(self, title, maximum_results=5):
+    def recommend_from_title(self, title, maximum_results=5, algorithm="bfs"):
         """
-        Find the song by title, then call BFS in the similarity graph.
+        Find the song by title, then call BFS in the similarity graph or rank songs with the scored recommender.
 
         title: string
         maximum_results: integer
+        algorithm: string, one of {"bfs", "scored"}
         returns: list of Song
         """
         verbose_log(
@@ -921,13 +1009,23 @@ class MusicLibrary():
         )
         #we don't need the other outputs from the binary search songs function so the "_" work as a placeholder to not get errors
         # binary search to check we have that song and also get the song object (since user is only giving us a string song title) with all its attributed needed for the recommendations call
-        song, _ , _ = binary_search_songs_by_title( 
-            self.sorted_songs_by_title_cache, title
-        )
+        song, _ , _ = self.sorted_songs_by_title.find(title.lower())
         if not song:
             print(f"{RED}No song with title {title} found for recommendations.{RESET}")
             return [] # if the song is not found return empty list
-        
+
+        if algorithm == "scored":
+            # rank the songs sharing an artist or genre by similarity score, best first
+            scored_songs = self.song_recommender.recommend(song, maximum_results=maximum_results)
+            verbose_log(
+                "Scored recommender returned "
+                + str(len(scored_songs))
+                + " song(s)."
+            )
+            return [scored_song for _, scored_song in scored_songs]
+        if algorithm != "bfs":
+            raise ValueError("Unknown recommendation algorithm: " + algorithm)
+
         # otherwise, call the recommendations function using the song graph. The song's song id is used as the starting node for BFS
         recommended_song_ids = self.song_similarity_graph.recommend_using_breadth_first_search(
             song.song_id, maximum_depth=2, maximum_results=maximum_results
@@ -1066,10 +1164,22 @@ def main():
                 set_verbose(True)
                 print()
                 print(f"{GREEN}Verbose mode is now ON.{RESET}")
+
+        elif user_choice == "8":
+            # trace records (every step, plus the counters of each sort and search) go to a JSON lines file
+            if tracer.trace_file:
+                tracer.close_file()
+                print()
+                print(f"{RED}Trace file is now OFF.{RESET}")
+            else:
+                tracer.open_file(TRACE_FILE_PATH)
+                print()
+                print(f"{GREEN}Trace file is now ON, appending to {TRACE_FILE_PATH}.{RESET}")
         
         elif user_choice == "0":
             # Autosave playlists as a convenience, on exit
             music_library.save_playlists("playlists.json")
+            tracer.close_file()
             print(f"{BLUE}{goodbye}{RESET}")
             break
 
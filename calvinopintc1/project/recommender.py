@@ -0,0 +1,210 @@
+# ======================
+# Scored top-k recommendations
+# ======================
+
+import heapq  # priority queue used to pull candidates best-first
+from collections import defaultdict
+from verbose import verbose_log
+
+# Weights of the similarity score between a base song and a candidate song
+ARTIST_WEIGHT = 2.0  # shared artist
+GENRE_WEIGHT = 1.0  # shared genre
+RATING_WEIGHT = 1.0  # times (1 - rating difference / MAX_RATING)
+PLAY_COUNT_WEIGHT = 0.5  # times (play count / largest play count in the library)
+MAX_RATING = 5.0
+
+CANDIDATE_LIST_SIZE = 20  # how many ranked candidates are kept per song once computed
+
+
+def _play_count_sort_key(song):
+    """
+    Key function: play count, highest first.
+
+    song: Song
+    returns: integer
+    """
+    return -song.play_count
+
+
+class SongRecommender:
+    """
+    Ranks the songs that share an artist or a genre with a base song by a similarity score:
+
+        ARTIST_WEIGHT  * (same artist)
+      + GENRE_WEIGHT   * (same genre)
+      + RATING_WEIGHT  * (1 - |rating difference| / MAX_RATING)
+      + PLAY_COUNT_WEIGHT * play_count / max_play_count
+
+    Songs are kept in buckets per artist and per genre, and inside those per rating, each bucket
+    sorted by play count. Every song in a bucket gets the same artist/genre/rating part of the
+    score, so the first song of a bucket is its best one. A heap of buckets (keyed by the best
+    score they can still give) hands out candidates best-first, and it can stop after k songs,
+    so a query costs O((B + k) log B) for B rating buckets, however big the artist or genre is.
+    Each song's ranked candidate list is kept once computed, so repeated queries cost O(k).
+
+    Attributes:
+        buckets_by_artist: dictionary from artist to {rating: list of Song sorted by play count}
+        buckets_by_genre: dictionary from genre to {rating: list of Song sorted by play count}
+        max_play_count: largest play count in the library (normalizes the play count part)
+        candidate_lists: dictionary from song_id to (list size asked for, list of (score, Song) best first)
+    """
+
+    def __init__(self):
+        self.buckets_by_artist = defaultdict(dict)
+        self.buckets_by_genre = defaultdict(dict)
+        self.max_play_count = 0
+        self.candidate_lists = {}
+        self.unsorted_buckets = []  # buckets whose play counts changed since they were sorted
+
+    def build_from_songs(self, song_list):
+        """
+        Bucket every song by artist and genre, then by rating. O(n log n) for the bucket sorts.
+
+        song_list: list of Song
+        """
+        self.buckets_by_artist.clear()
+        self.buckets_by_genre.clear()
+        self.candidate_lists.clear()
+        self.unsorted_buckets = []
+        self.max_play_count = 0
+
+        for song in song_list:  # drop every song into its two buckets, sorting comes after
+            self.buckets_by_artist[song.norm_artist].setdefault(song.rating, []).append(song)
+            self.buckets_by_genre[song.norm_genre].setdefault(song.rating, []).append(song)
+            self.max_play_count = max(self.max_play_count, song.play_count)
+
+        for buckets_by_group in (self.buckets_by_artist, self.buckets_by_genre):
+            for buckets in buckets_by_group.values():
+                for bucket in buckets.values():
+                    bucket.sort(key=_play_count_sort_key)  # most played first
+
+        verbose_log(
+            "SongRecommender built with "
+            + str(len(song_list))
+            + " songs bucketed by "
+            + str(len(self.buckets_by_artist))
+            + " artists and "
+            + str(len(self.buckets_by_genre))
+            + " genres."
+        )
+
+    def song_played(self, song):
+        """
+        Note that a song's play count went up, which changes its place in its buckets.
+        The buckets are re-sorted on the next query, so a playback of many songs only pays once.
+
+        song: Song
+        """
+        self.unsorted_buckets.append(self.buckets_by_artist[song.norm_artist][song.rating])
+        self.unsorted_buckets.append(self.buckets_by_genre[song.norm_genre][song.rating])
+        self.max_play_count = max(self.max_play_count, song.play_count)
+        self.candidate_lists.clear()  # play counts are part of every score
+
+    def score(self, base_song, song):
+        """
+        Similarity score of song as a recommendation for base_song.
+
+        base_song: Song
+        song: Song
+        returns: float
+        """
+        score = self._rating_score(base_song, song.rating) + self._play_count_score(song)
+        if song.norm_artist == base_song.norm_artist:
+            score += ARTIST_WEIGHT
+        if song.norm_genre == base_song.norm_genre:
+            score += GENRE_WEIGHT
+        return score
+
+    def _rating_score(self, base_song, rating):
+        """
+        Rating proximity part of the score.
+        """
+        return RATING_WEIGHT * (1 - min(abs(base_song.rating - rating), MAX_RATING) / MAX_RATING)
+
+    def _play_count_score(self, song):
+        """
+        Play count part of the score.
+        """
+        if self.max_play_count == 0:
+            return 0.0
+        return PLAY_COUNT_WEIGHT * song.play_count / self.max_play_count
+
+    def recommend(self, base_song, maximum_results=5):
+        """
+        The best scored songs sharing an artist or a genre with base_song.
+
+        base_song: Song
+        maximum_results: integer
+        returns: list of (score, Song), best first
+        """
+        for bucket in self.unsorted_buckets:  # nearly sorted already, so each sort is about linear
+            bucket.sort(key=_play_count_sort_key)
+        self.unsorted_buckets = []
+
+        cached = self.candidate_lists.get(base_song.song_id)
+        if cached is not None and (cached[0] >= maximum_results or len(cached[1]) < cached[0]):  # long enough, or holds every candidate
+            verbose_log("Using cached candidate list for song id " + base_song.song_id + ".")
+            return cached[1][:maximum_results]
+
+        list_size = max(maximum_results, CANDIDATE_LIST_SIZE)
+        candidate_list = self._top_candidates(base_song, list_size)
+        self.candidate_lists[base_song.song_id] = (list_size, candidate_list)
+        return candidate_list[:maximum_results]
+
+    def _top_candidates(self, base_song, k):
+        """
+        Pull the k best candidates from the buckets, best first.
+
+        Heap entries are either a bucket cursor, keyed by an upper bound on the score of the bucket's
+        next song, or a scored song, keyed by its exact score. A scored song popped off the top beats
+        everything any bucket can still give, so it is the next recommendation.
+        Songs by the same artist are only taken from the artist buckets, so no song comes out twice.
+
+        base_song: Song
+        k: integer
+        returns: list of (score, Song)
+        """
+        heap = []  # (-score or -upper bound, tie breaker, song or None, bucket, position, group bonus, is genre group)
+        tie_breaker = 0
+
+        groups = [
+            (self.buckets_by_artist.get(base_song.norm_artist, {}), ARTIST_WEIGHT + GENRE_WEIGHT, False),  # upper bound: might share the genre too
+            (self.buckets_by_genre.get(base_song.norm_genre, {}), GENRE_WEIGHT, True),  # same artist songs are skipped here
+        ]
+        for buckets, group_bonus, is_genre_group in groups:
+            for rating, bucket in buckets.items():
+                if bucket:
+                    upper_bound = group_bonus + self._rating_score(base_song, rating) + self._play_count_score(bucket[0])
+                    heap.append((-upper_bound, tie_breaker, None, bucket, 0, group_bonus, is_genre_group))
+                    tie_breaker += 1
+        heapq.heapify(heap)
+
+        candidate_list = []
+        while heap and len(candidate_list) < k:
+            negative_value, _, song, bucket, position, group_bonus, is_genre_group = heapq.heappop(heap)
+            if song is not None:  # an exact score at the top of the heap: nothing left can beat it
+                candidate_list.append((-negative_value, song))
+                continue
+
+            candidate = bucket[position]
+            if position + 1 < len(bucket):  # the bucket's next song is its next best one
+                upper_bound = group_bonus + self._rating_score(base_song, candidate.rating) + self._play_count_score(bucket[position + 1])
+                heapq.heappush(heap, (-upper_bound, tie_breaker, None, bucket, position + 1, group_bonus, is_genre_group))
+                tie_breaker += 1
+
+            if candidate is base_song:
+                continue
+            if is_genre_group and candidate.norm_artist == base_song.norm_artist:  # comes out of the artist buckets instead
+                continue
+            heapq.heappush(heap, (-self.score(base_song, candidate), tie_breaker, candidate, None, 0, 0, False))
+            tie_breaker += 1
+
+        verbose_log(
+            "Scored recommender ranked "
+            + str(len(candidate_list))
+            + " candidate(s) for song id "
+            + base_song.song_id
+            + "."
+        )
+        return candidate_list
+
@@ -0,0 +1,183 @@
+# ======================
+# Sorted block list of songs
+# ======================
+
+import time  # used to measure how long searching takes
+from bisect import bisect_left, bisect_right, insort_right
+from verbose import verbose_log, tracer, STEP
+
+BLOCK_SIZE = 256  # a block is split in two once it holds twice this many songs
+
+
+class SortedSongList:
+    """
+    Songs kept sorted by a key function, stored as a list of sorted blocks.
+
+    A binary search over the last key of every block finds the block a key belongs to,
+    and a second one finds its place inside that block, so finding, inserting and removing
+    a song cost O(log n) comparisons plus moving at most 2 * BLOCK_SIZE references, instead
+    of re-sorting the whole catalog.
+
+    Attributes:
+        key_function: function that takes a Song and returns its sort key
+        blocks: list of non-empty lists of Song, each sorted, in order
+        block_last_keys: sort key of the last song of each block
+    """
+
+    def __init__(self, key_function, song_list=()):
+        self.key_function = key_function
+        self.blocks = []
+        self.block_last_keys = []
+        self.length = 0
+        for song in song_list:
+            self.add(song)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        """
+        Songs in ascending key order.
+        """
+        for block in self.blocks:
+            yield from block
+
+    def __reversed__(self):
+        """
+        Songs in descending key order.
+        """
+        for block in reversed(self.blocks):
+            yield from reversed(block)
+
+    def add(self, song):
+        """
+        Insert a song after any songs with an equal key. O(log n + BLOCK_SIZE).
+
+        song: Song
+        """
+        key = self.key_function(song)
+        if not self.blocks:
+            self.blocks.append([song])
+            self.block_last_keys.append(key)
+            self.length = 1
+            return
+
+        block_index = min(bisect_right(self.block_last_keys, key), len(self.blocks) - 1)  # first block with a bigger last key, or the last block
+        block = self.blocks[block_index]
+        insort_right(block, song, key=self.key_function)
+        self.block_last_keys[block_index] = self.key_function(block[-1])
+        self.length += 1
+
+        if len(block) >= 2 * BLOCK_SIZE:  # split a full block in two halves
+            second_half = block[BLOCK_SIZE:]
+            del block[BLOCK_SIZE:]
+            self.blocks.insert(block_index + 1, second_half)
+            self.block_last_keys.insert(block_index + 1, self.block_last_keys[block_index])
+            self.block_last_keys[block_index] = self.key_function(block[-1])
+
+    def remove(self, song):
+        """
+        Remove this song (the same object, other songs may share its key). O(log n + BLOCK_SIZE).
+
+        song: Song
+        returns: True if the song was removed, False if it was not in the list
+        """
+        key = self.key_function(song)
+        block_index = bisect_left(self.block_last_keys, key)
+        while block_index < len(self.blocks):  # songs with this key can span several blocks
+            block = self.blocks[block_index]
+            position = bisect_left(block, key, key=self.key_function)
+            while position < len(block) and self.key_function(block[position]) == key:
+                if block[position] is song:
+                    del block[position]
+                    self.length -= 1
+                    if block:
+                        self.block_last_keys[block_index] = self.key_function(block[-1])
+                    else:  # drop empty blocks so every block has a last key
+                        del self.blocks[block_index]
+                        del self.block_last_keys[block_index]
+                    return True
+                position += 1
+            if position < len(block):  # stopped at a bigger key, so the song isn't here
+                return False
+            block_index += 1
+        return False
+
+    def find(self, key):
+        """
+        Binary search for a song with this key: first over the blocks, then inside one block.
+
+        key: sort key (for example a lowercased title)
+        returns: (Song object or None, number_of_comparisons, elapsed_seconds)
+        """
+        verbose_log("Starting binary search for key '%s' in %d sorted songs (%d blocks).", key, self.length, len(self.blocks))
+
+        number_of_comparisons = 0  # counts comparisons, on both levels
+        tracing = tracer.level >= STEP
+        start_time = time.perf_counter()  # start timing right before the search
+
+        low_index = 0  # search range over the blocks, for the first block whose last key is >= key
+        high_index = len(self.blocks)
+        while low_index < high_index:
+            mid_index = (low_index + high_index) // 2
+            number_of_comparisons += 1
+            if tracing:
+                tracer.log(STEP, "Block search comparison #%d: checking block %d with last key '%s'.", number_of_comparisons, mid_index, self.block_last_keys[mid_index])
+                tracer.count("comparisons")
+            if self.block_last_keys[mid_index] < key:
+                low_index = mid_index + 1
+            else:
+                high_index = mid_index
+
+        found_song = None
+        if low_index < len(self.blocks):
+            block = self.blocks[low_index]
+            low_position = 0  # search range inside the block, same as a plain binary search
+            high_position = len(block) - 1
+            while high_position >= low_position:
+                mid_position = (low_position + high_position) // 2
+                number_of_comparisons += 1
+                mid_key = self.key_function(block[mid_position])
+                if tracing:  # the trace output impacts the time computation, turn tracing off for accurate measures
+                    tracer.log(STEP, "Binary search comparison #%d: checking index %d of block %d with key '%s'.", number_of_comparisons, mid_position, low_index, mid_key)
+                    tracer.count("comparisons")
+                if mid_key < key:
+                    low_position = mid_position + 1
+                elif mid_key > key:
+                    high_position = mid_position - 1
+                else:
+                    found_song = block[mid_position]
+                    break
+
+        elapsed_seconds = time.perf_counter() - start_time
+
+        verbose_log(
+            "Sorted block list search "
+            + ("found" if found_song else "did not find")
+            + " the key after "
+            + str(number_of_comparisons)
+            + " comparisons over "
+            + str(len(self.blocks))
+            + " block(s)."
+        )
+        return found_song, number_of_comparisons, elapsed_seconds
+
+    def prefix_range(self, prefix):
+        """
+        Songs whose key starts with prefix, in ascending order. O(log n + matches).
+
+        prefix: string
+        returns: list of Song
+        """
+        matching_songs = []
+        block_index = bisect_left(self.block_last_keys, prefix)  # first block that can hold a key >= prefix
+        while block_index < len(self.blocks):
+            block = self.blocks[block_index]
+            position = bisect_left(block, prefix, key=self.key_function) if not matching_songs else 0
+            while position < len(block):
+                if not self.key_function(block[position]).startswith(prefix):  # keys with this prefix are contiguous
+                    return matching_songs
+                matching_songs.append(block[position])
+                position += 1
+            block_index += 1
+        return matching_songs
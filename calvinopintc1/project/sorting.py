@@ -2,7 +2,7 @@
 # Sorting algorithms (quicksort and merge sort)
 # ======================
 
-from verbose import verbose_log 
+from verbose import tracer, STEP
 
 
 def partition_song_list(song_list, start_index, end_index, key_function):
@@ -23,19 +23,29 @@ def partition_song_list(song_list, start_index, end_index, key_function):
 
     partition_done = False  # use a boolean flag to control the outer loop
 
-    verbose_log(f"Partitioning sub-array from index {start_index} to {end_index} with pivot value {pivot_value}.")
+    tracing = tracer.level >= STEP
+    if tracing:
+        tracer.log(STEP, "Partitioning sub-array from index %d to %d with pivot value %s.", start_index, end_index, pivot_value)
 
     while not partition_done:  # keep moving pointers until they cross
+        scan_left_start = left_index  # remember where both scans start, so the comparisons can be counted afterwards
+        scan_right_start = right_index
+
         while key_function(song_list[left_index]) < pivot_value:  # move left pointer right until we find something >= pivot
             left_index = left_index + 1  # increment
 
         while pivot_value < key_function(song_list[right_index]):  # move right pointer left until we find something <= pivot
             right_index = right_index - 1  # decrement
 
+        if tracing:  # each scan made one comparison per step, plus the one that stopped it
+            tracer.count("comparisons", (left_index - scan_left_start) + (scan_right_start - right_index) + 2)
+
         if left_index >= right_index:  # when pointers cross, partitioning is complete
             partition_done = True  # set the flag to end the outer while loop
         else:
-            verbose_log(f"Swapping songs at indices {left_index} and {right_index} during partition.")
+            if tracing:
+                tracer.log(STEP, "Swapping songs at indices %d and %d during partition.", left_index, right_index)
+                tracer.count("swaps")
 
             temp_song = song_list[left_index]  # store left item in a temp variable 
             song_list[left_index] = song_list[right_index]  # move right item into the left position
@@ -44,7 +54,8 @@ def partition_song_list(song_list, start_index, end_index, key_function):
             left_index = left_index + 1  # after swapping, move left pointer inward
             right_index = right_index - 1  # after swapping, move right pointer inward
 
-    verbose_log(f"Partition complete; returning partition index {right_index}.")  # "high is the last index in the left segment"
+    if tracing:
+        tracer.log(STEP, "Partition complete; returning partition index %d.", right_index)  # "high is the last index in the left segment"
     return right_index  # return the final right boundary of the left partition
 
 
@@ -60,7 +71,8 @@ def quicksort_song_list(song_list, start_index, end_index, key_function):
     if end_index <= start_index:  # base case: 0 or 1 element means the segment is already sorted
         return  # stop recursion
 
-    verbose_log(f"Quicksort called on range [{start_index}, {end_index}] ({end_index - start_index + 1} items).")
+    if tracer.level >= STEP:
+        tracer.log(STEP, "Quicksort called on range [%d, %d] (%d items).", start_index, end_index, end_index - start_index + 1)
 
     partition_index = partition_song_list(song_list, start_index, end_index, key_function)  # partition the list segment around pivot
     quicksort_song_list(song_list, start_index, partition_index, key_function)  # recursively sort the left partition (inclusive)
@@ -83,7 +95,9 @@ def merge_songs(song_list, left_first_index, left_last_index, right_last_index,
     left_position = left_first_index  # pointer for the left partition
     right_position = left_last_index + 1  # pointer for the right partition (starts right after left_last_index)
 
-    verbose_log(f"Merging sub-arrays [{left_first_index}, {left_last_index}] and [{left_last_index + 1}, {right_last_index}].")
+    tracing = tracer.level >= STEP
+    if tracing:
+        tracer.log(STEP, "Merging sub-arrays [%d, %d] and [%d, %d].", left_first_index, left_last_index, left_last_index + 1, right_last_index)
 
     while left_position <= left_last_index and right_position <= right_last_index:  # keep merging while both sides still have items
         left_key = key_function(song_list[left_position])  # compute left key once for clarity
@@ -98,6 +112,9 @@ def merge_songs(song_list, left_first_index, left_last_index, right_last_index,
 
         merge_position = merge_position + 1  # advance merge position after placing one item
 
+    if tracing:  # the loop above made one key comparison per item it placed
+        tracer.count("comparisons", merge_position)
+
     while left_position <= left_last_index:  # if left partition still has items, copy them over
         merged_song_list[merge_position] = song_list[left_position]  # copy the next left item into the merged list
         left_position = left_position + 1  # advance left pointer
@@ -110,7 +127,8 @@ def merge_songs(song_list, left_first_index, left_last_index, right_last_index,
 
     for offset in range(merged_size):
         song_list[left_first_index + offset] = merged_song_list[offset]
-    verbose_log(f"Merge complete for range [{left_first_index}, {right_last_index}].")
+    if tracing:
+        tracer.log(STEP, "Merge complete for range [%d, %d].", left_first_index, right_last_index)
 
 
 def merge_sort_song_list(song_list, start_index, end_index, key_function):
@@ -124,7 +142,8 @@ def merge_sort_song_list(song_list, start_index, end_index, key_function):
     """
     if start_index < end_index:  # only split/merge when there are at least 2 elements
         midpoint_index = (start_index + end_index) // 2  # compute midpoint
-        verbose_log(f"Merge sort called on range [{start_index}, {end_index}] with midpoint {midpoint_index}.")
+        if tracer.level >= STEP:
+            tracer.log(STEP, "Merge sort called on range [%d, %d] with midpoint %d.", start_index, end_index, midpoint_index)
 
         merge_sort_song_list(song_list, start_index, midpoint_index, key_function)  # recursively sort left half
         merge_sort_song_list(song_list, midpoint_index + 1, end_index, key_function)  # recursively sort right half
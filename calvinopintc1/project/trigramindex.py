@@ -0,0 +1,119 @@
+# ======================
+# Trigram index for substring title search
+# ======================
+
+import time  # used to measure how long searching takes
+from bisect import bisect_left, insort
+from verbose import verbose_log, tracer, STEP
+
+GRAM_LENGTH = 3  # trigrams; shorter grams are indexed too so 1-2 character searches are plain lookups
+
+
+class TrigramIndex:
+    """
+    Inverted index from every 1, 2 and 3 character substring (gram) of a normalized title
+    to the songs whose title contains it.
+
+    A title containing the searched substring must contain each of its trigrams, so only
+    the songs listed under the substring's rarest trigram need to be checked. Substrings
+    of 3 characters or fewer are grams themselves, and their list is exactly the answer.
+
+    Attributes:
+        songs: list of Song, in the order they were added (a song's position in this list is its id here)
+        titles_norm: list of lowercased titles, same positions as songs
+        positions_by_song_id: dictionary from song_id to position
+        postings: dictionary from gram to ascending list of positions
+    """
+
+    def __init__(self):
+        self.songs = []
+        self.titles_norm = []
+        self.positions_by_song_id = {}
+        self.postings = {}
+
+    def _grams(self, title_norm):
+        """
+        Every distinct substring of length 1 to GRAM_LENGTH of a title.
+
+        title_norm: string
+        returns: set of strings
+        """
+        return {
+            title_norm[start:start + length]
+            for length in range(1, GRAM_LENGTH + 1)
+            for start in range(len(title_norm) - length + 1)
+        }
+
+    def add_song(self, song):
+        """
+        Index a song's title. A song with an id already indexed replaces the old one in place,
+        the same way it replaces it in the library's songs_by_id.
+
+        song: Song
+        """
+        title_norm = song.title.lower()  # normalize so search is case-insensitive
+        position = self.positions_by_song_id.get(song.song_id)
+        if position is None:  # new song: goes at the end, so appending keeps every posting list ascending
+            position = len(self.songs)
+            self.positions_by_song_id[song.song_id] = position
+            self.songs.append(song)
+            self.titles_norm.append(title_norm)
+            postings = self.postings
+            for gram in self._grams(title_norm):
+                if gram in postings:
+                    postings[gram].append(position)
+                else:
+                    postings[gram] = [position]
+            return
+
+        old_grams = self._grams(self.titles_norm[position])  # replaced song: move its position between posting lists
+        new_grams = self._grams(title_norm)
+        for gram in old_grams - new_grams:
+            posting = self.postings[gram]
+            del posting[bisect_left(posting, position)]
+        for gram in new_grams - old_grams:
+            insort(self.postings.setdefault(gram, []), position)
+        self.songs[position] = song
+        self.titles_norm[position] = title_norm
+
+    def search(self, substring_norm):
+        """
+        Find every song whose title contains the normalized substring.
+
+        substring_norm: string (lowercased)
+        returns: (matching_songs_list, number_of_comparisons, elapsed_seconds)
+        """
+        start_time = time.perf_counter()  # start timing as close to the lookup as possible
+
+        if substring_norm == "":  # the empty string is in every title
+            matching_songs = list(self.songs)
+            number_of_comparisons = 0
+        elif len(substring_norm) <= GRAM_LENGTH:  # the substring is a gram, its posting list is the answer
+            matching_songs = [self.songs[position] for position in self.postings.get(substring_norm, [])]
+            number_of_comparisons = 0
+        else:
+            # check only the songs containing the substring's rarest trigram
+            rarest_posting = None
+            for start in range(len(substring_norm) - GRAM_LENGTH + 1):
+                posting = self.postings.get(substring_norm[start:start + GRAM_LENGTH], [])
+                if rarest_posting is None or len(posting) < len(rarest_posting):
+                    rarest_posting = posting
+            matching_songs = []
+            number_of_comparisons = 0
+            for position in rarest_posting:
+                number_of_comparisons += 1  # one title checked, same as a step of the linear search
+                if substring_norm in self.titles_norm[position]:
+                    matching_songs.append(self.songs[position])
+
+        elapsed_seconds = time.perf_counter() - start_time
+
+        if tracer.level >= STEP:
+            tracer.count("comparisons", number_of_comparisons)
+        verbose_log(
+            "Trigram index search completed with "
+            + str(number_of_comparisons)
+            + " comparisons and "
+            + str(len(matching_songs))
+            + " match(es)."
+        )
+        return matching_songs, number_of_comparisons, elapsed_seconds
@@ -1,17 +1,139 @@
 # ======================
-# Global verbose toggle
+# Global verbose toggle + tracing
 # ======================
 
+import json
+import time
+
 # ANSI color codes
 YELLOW = "\033[93m" # ANSI escape sequence for yellow text
 RESET = "\033[0m"   # ANSI escape sequence to reset text color
 
-def verbose_log(message):
-    """Prints a colored verbose message if verbose mode is enabled."""
-    if VERBOSE_MODE_ENABLED:
-        print(f"{YELLOW}[VERBOSE] {message}{RESET}")
+# Trace levels, from least to most detailed
+OFF = 0
+SUMMARY = 1  # one message per operation (a load, a search, a sort)
+STEP = 2     # one message per step inside an algorithm's loop (a comparison, a swap, a visited node)
+
+VERBOSE_MODE_ENABLED = False
+
+
+class Tracer:
+    """
+    Structured tracing shared by the whole project.
+
+    Messages are only formatted once they are going to be written, and hot loops check the
+    level themselves before calling log or count, so with tracing off the only cost left is
+    one comparison:
+
+        tracing = tracer.level >= STEP  # read once, before the loop
+        ...
+        if tracing:
+            tracer.log(STEP, "Swapping songs at indices %d and %d.", left_index, right_index)
+            tracer.count("swaps")
+
+    Attributes:
+        level: most detailed level written anywhere (OFF when there is nowhere to write)
+        console: True to print messages (verbose mode)
+        trace_file: open file receiving one JSON record per message, or None
+        counters: dictionary from counter name ("comparisons", "swaps", "nodes_visited") to integer
+    """
+
+    def __init__(self):
+        self.level = OFF
+        self.console = False
+        self.trace_file = None
+        self.trace_path = None
+        self.counters = {}
+        self.start_time = time.perf_counter()
+
+    def _update_level(self):
+        """
+        Trace every step as long as the console or the trace file wants messages.
+        """
+        self.level = STEP if self.console or self.trace_file else OFF
+
+    def log(self, level, message, *args):
+        """
+        Write a message, formatting it with %-style args only if it is going to be written.
+
+        level: SUMMARY or STEP
+        message: string, a %-style format string if args are given
+        """
+        if level > self.level:
+            return
+        if args:
+            message = message % args
+        if self.console:
+            print(f"{YELLOW}[VERBOSE] {message}{RESET}")
+        if self.trace_file:
+            self._write_record({"level": "summary" if level == SUMMARY else "step", "message": message})
+
+    def count(self, name, amount=1):
+        """
+        Add amount to a counter. Callers only count while tracing, like they only log.
+
+        name: string
+        amount: integer
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset_counters(self):
+        """
+        Zero every counter, before the operation to measure.
+        """
+        self.counters = {}
+
+    def report_counters(self, label):
+        """
+        Write the current counters as one summary message (and one structured record in the trace file).
+
+        label: string describing what was measured
+        """
+        if self.level < SUMMARY:
+            return
+        summary = ", ".join(name + "=" + str(value) for name, value in sorted(self.counters.items()))
+        if self.console:
+            print(f"{YELLOW}[VERBOSE] {label} counters: {summary or 'none'}{RESET}")
+        if self.trace_file:
+            self._write_record({"level": "summary", "label": label, "counters": dict(self.counters)})
+
+    def open_file(self, path):
+        """
+        Start appending trace records to a file (JSON lines).
+
+        path: string
+        """
+        self.close_file()
+        self.trace_file = open(path, "a", encoding="utf-8")
+        self.trace_path = path
+        self._update_level()
+
+    def close_file(self):
+        """
+        Stop writing trace records to the file, if one is open.
+        """
+        if self.trace_file:
+            self.trace_file.close()
+        self.trace_file = None
+        self.trace_path = None
+        self._update_level()
+
+    def _write_record(self, record):
+        record["time"] = round(time.perf_counter() - self.start_time, 6)  # seconds since the program started
+        self.trace_file.write(json.dumps(record) + "\n")
+
+
+tracer = Tracer()  # the one tracer every module imports
+
+
+def verbose_log(message, *args):
+    """Prints a colored verbose message if verbose mode is enabled (args are %-formatted lazily)."""
+    if tracer.level >= SUMMARY:
+        tracer.log(SUMMARY, message, *args)
 
 def set_verbose(enabled: bool):
     """Enable or disable verbose logging globally."""
     global VERBOSE_MODE_ENABLED
     VERBOSE_MODE_ENABLED = enabled
+    tracer.console = enabled
+    tracer._update_level()